@@ -0,0 +1,46 @@
+"""
+   getmydnamatches - Retrieve and visualize DNA matches from AncestryDNA and 23andMe
+   Copyright (C) 2015-2018 Giulio Genovese (giulio.genovese@gmail.com)
+
+   This program is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+   Written by Giulio Genovese <giulio.genovese@gmail.com>
+"""
+
+import importlib
+
+# subcommands with their descriptions, each implemented by the module with the same name
+commands = {'getmyancestrydna': 'Retrieve DNA matches from AncestryDNA',
+            'getmy23andme': 'Retrieve DNA matches from 23andMe',
+            'ancestry2graph': 'Process AncestryDNA data dump',
+            'ibdview2graph': 'Process 23andMe IBD sharing data dump',
+            'graph2matrix': 'Convert AncestryDNA/23andMe matches graph to matrix',
+            'graph2clusters': 'Cluster shared matches from graph file',
+            'graph2plot': 'Generate visualization from graph file',
+            'matches2plot': 'Creates a plot of sharing',
+            'dnadb': 'Query an indexed local database of matches',
+            'pipeline': 'Run a pipeline of subcommands with cached outputs',
+            'benchmark': 'Benchmark the processing subcommands on synthetic data'}
+
+modules = set(commands) | {'dnaio', 'dnagraph', 'graphlayout', 'session', 'lazy', 'profiler', 'relationships', 'synthetic'}
+
+# runs a subcommand with a list of command line arguments in the current process
+def run(command, *argv):
+    importlib.import_module('.' + command, __name__).main(list(argv))
+
+# modules are only imported when they are first used
+def __getattr__(name):
+    if name in modules:
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError('module ' + __name__ + ' has no attribute ' + name)
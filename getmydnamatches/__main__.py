@@ -0,0 +1,23 @@
+"""
+   __main__.py - Allows running the subcommands with python3 -m getmydnamatches
+   Copyright (C) 2015-2018 Giulio Genovese (giulio.genovese@gmail.com)
+
+   This program is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+   Written by Giulio Genovese <giulio.genovese@gmail.com>
+"""
+
+from .cli import main
+
+main()
@@ -0,0 +1,155 @@
+"""
+   ancestry2graph.py - Process 23andMe IBD sharing data dump
+   Copyright (C) 2015-2018 Giulio Genovese (giulio.genovese@gmail.com)
+
+   This program is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+   Written by Giulio Genovese <giulio.genovese@gmail.com>
+"""
+
+import sys, argparse
+from .lazy import lazy_import
+from .dnaio import read_table, write_table
+from .relationships import add_relationships
+from .profiler import profiler, add_argument, get_prefix
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# returns the guid of the owner of the kit, the only individual with no meioses, which getmyancestrydna.py adds
+# as the last row of the matches table
+def get_owner(df):
+    owner = df.loc[df['meiosisValue'] == 0, 'testGuid'].unique()
+    if len(owner) != 1:
+        raise ValueError('matches table with ' + str(len(owner)) + ' kit owners rather than one')
+    return owner[0]
+
+# returns the edges of the matches graph as (human_id_1, human_id_2, seg_cm, segments) with one row per unordered pair
+def get_edges(df, distant = False):
+    user_guid = get_owner(df)
+    guids = df['testGuid']
+    df = df[df['testGuid'] != user_guid]
+    if distant:
+        df = df[df['meiosisValue'] < 10]
+    order = np.arange(len(df))
+
+    # edges between the user and each match
+    segments = df['sharedSegments'].values.astype(float) if 'sharedSegments' in df else float('NaN')
+    user = pd.DataFrame({'human_id_1': user_guid, 'human_id_2': df['testGuid'].values, 'seg_cm': df['sharedCentimorgans'].values.astype(float),
+                         'segments': segments, 'order': order, 'sub': 0})
+
+    # edges between each match and its matches in common
+    icw = pd.DataFrame({'human_id_1': df['testGuid'].values, 'human_id_2': df['matchesInCommon'].values, 'order': order})
+    icw = icw.dropna(subset = ['human_id_2'])
+    icw['human_id_2'] = icw['human_id_2'].str.split(',')
+    icw = icw.explode('human_id_2')
+    missing = ~icw['human_id_2'].isin(guids)
+    for guid in icw.loc[missing, 'human_id_2'].unique():
+        sys.stderr.write('Warning: ' + guid + ' not in input matches file\n')
+    icw = icw[~missing]
+    icw['seg_cm'] = float('NaN')
+    icw['segments'] = float('NaN')
+    icw['sub'] = 1
+
+    # keep the first occurrence of each unordered pair in input order
+    edges = pd.concat([user, icw], ignore_index = True).sort_values(['order', 'sub'], kind = 'stable')
+    edges = edges[~get_pairs(edges).duplicated()]
+    return edges[['human_id_1', 'human_id_2', 'seg_cm', 'segments']].reset_index(drop = True)
+
+# returns the unordered pair of each edge with the two ids in sorted order
+def get_pairs(edges):
+    swap = edges['human_id_1'] > edges['human_id_2']
+    key1 = edges['human_id_1'].where(~swap, edges['human_id_2'])
+    key2 = edges['human_id_2'].where(~swap, edges['human_id_1'])
+    return pd.DataFrame({'key1': key1, 'key2': key2})
+
+# merges two edge tables keeping one edge per unordered pair with the largest available seg_cm and segments
+def merge_edges(edges1, edges2):
+    edges = pd.concat([edges1, edges2], ignore_index = True)
+    pairs = get_pairs(edges)
+    shared = edges[['seg_cm', 'segments']].groupby([pairs['key1'], pairs['key2']], sort = False).transform('max')
+    idx = ~pairs.duplicated()
+    edges = edges[idx].reset_index(drop = True)
+    edges[['seg_cm', 'segments']] = shared[idx].values
+    return edges
+
+# adds labels and genders of both individuals to each edge
+def label_edges(edges, df):
+    guids = pd.Index(df['testGuid'])
+    idx1 = guids.get_indexer(edges['human_id_1'])
+    idx2 = guids.get_indexer(edges['human_id_2'])
+    labels = np.append(df['matchTestDisplayName'].values, np.nan)
+    genders = np.append(df['subjectGender'].values, np.nan)
+    return pd.DataFrame({'human_id_1': edges['human_id_1'].values,
+                         'name_1': labels[idx1],
+                         'sex_1': genders[idx1],
+                         'human_id_2': edges['human_id_2'].values,
+                         'name_2': labels[idx2],
+                         'sex_2': genders[idx2],
+                         'seg_cm': edges['seg_cm'].values,
+                         'segments': edges['segments'].values})
+
+# returns the graph of a list of matches tables, one per kit, processing one kit at a time
+# so that only the unique edges are held in memory
+def get_graph(tables, distant = False):
+    edges, nodes = None, None
+    for df in tables:
+        df = df.copy()
+        df.loc[~df['matchTestSubjectIsAdmin'],'matchTestDisplayName'] += ' (administered by ' + df.loc[~df['matchTestSubjectIsAdmin'],'matchTestAdminDisplayName'] + ')'
+        df = df[['testGuid', 'matchTestDisplayName', 'subjectGender', 'meiosisValue', 'sharedCentimorgans', 'matchesInCommon'] + (['sharedSegments'] if 'sharedSegments' in df else [])]
+        edges = get_edges(df, distant) if edges is None else merge_edges(edges, get_edges(df, distant))
+        nodes = df.iloc[:, 0:3] if nodes is None else pd.concat([nodes, df.iloc[:, 0:3]], ignore_index = True)
+        nodes = nodes.drop_duplicates('testGuid')
+    return add_relationships(label_edges(edges, nodes))
+
+def get_parser():
+    parser = argparse.ArgumentParser(description = 'Process AncestryDNA data dump (16 Aug 2018)', add_help = False, usage = 'ancestry2graph.py -i <matches> [<matches> ...] [options]')
+    parser.add_argument('-d', action = 'store_true', default = False, help = 'whether to remove distant cousins [False]')
+    try:
+        parser.add_argument('-i', metavar = '<FILE>', nargs = '+', type = argparse.FileType('r', encoding = 'UTF-8'), default = [sys.stdin], help = 'input matches files, one per kit [stdin]')
+        parser.add_argument('-o', metavar = '<FILE>', type = argparse.FileType('w', encoding = 'UTF-8'), default = sys.stdout, help = 'output graph file [stdout]')
+    except TypeError:
+        sys.stderr.write('Python >= 3.4 is required to run this script\n')
+        sys.stderr.write('(see https://docs.python.org/3/whatsnew/3.4.html#argparse)\n')
+        exit(2)
+    add_argument(parser)
+    return parser
+
+def main(argv = None):
+    parser = get_parser()
+
+    # extract arguments from the command line
+    try:
+        parser.error = parser.exit
+        args = parser.parse_args(argv)
+    except SystemExit:
+        parser.print_help()
+        exit(2)
+
+    profiler.start('ancestry2graph', args.profile, get_prefix(args.o, 'ancestry2graph'))
+
+    # tables are read one at a time as they are needed
+    profiler.mark('table')
+    try:
+        df2 = get_graph((read_table(f) for f in args.i), args.d)
+    except ValueError as e:
+        sys.stderr.write('Error: ' + str(e) + '\n')
+        exit(2)
+    profiler.mark('write')
+    write_table(df2, args.o)
+
+    profiler.stop()
+
+if __name__ == '__main__':
+    main()
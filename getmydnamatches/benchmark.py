@@ -0,0 +1,158 @@
+"""
+   benchmark.py - Time and memory benchmarks of the processing subcommands on synthetic data
+   Copyright (C) 2015-2018 Giulio Genovese (giulio.genovese@gmail.com)
+
+   This program is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+   Written by Giulio Genovese <giulio.genovese@gmail.com>
+"""
+
+import os, sys, argparse, json, time, platform, importlib, multiprocessing, concurrent.futures
+from .synthetic import chroms, write_dataset
+
+stages = ['ancestry2graph', 'ibdview2graph', 'graph2matrix', 'graph2clusters', 'graph2plot']
+
+# stages that read the graph file written by ancestry2graph
+graph_stages = ['graph2matrix', 'graph2clusters', 'graph2plot']
+
+def log(text):
+    sys.stderr.write('[' + time.strftime("%Y-%m-%d %H:%M:%S") + '] ' + text + '\n')
+
+# returns the command line arguments of a stage on a synthetic data set
+def get_argv(stage, dataset, ext):
+    files = dataset['files']
+    path = os.path.dirname(files['matches'])
+    graph = os.path.join(path, 'graph' + ext)
+    return {'ancestry2graph': ['-i', files['matches'], '-o', graph],
+            'ibdview2graph': ['-h', files['inheritance'], '-i', files['ibdview'], '-c'] + chroms + ['-g'] + files['maps'] + ['-o', os.path.join(path, 'ibd.graph' + ext)],
+            'graph2matrix': ['-f', 'gexf', '-i', graph, '-anc', files['matches'], '-o', os.path.join(path, 'graph.gexf')],
+            'graph2clusters': ['-i', graph, '-x', dataset['user'], '-o', os.path.join(path, 'clusters.tsv')],
+            'graph2plot': ['-n', '-i', graph, '-anc', files['matches'], '-o', os.path.join(path, 'graph.pdf')]}[stage]
+
+# runs a subcommand measuring its running time and the peak resident memory of the process
+# or, as tracing slows down the subcommand, the peak memory allocated while tracing allocations
+def measure(command, argv, trace = False):
+    if trace:
+        import tracemalloc
+        tracemalloc.start()
+    start = time.perf_counter()
+    importlib.import_module('.' + command, __package__).main(argv)
+    result = {'seconds': time.perf_counter() - start}
+    if trace:
+        result['peak_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    try:
+        import resource
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        result['maxrss_mb'] = maxrss / 2**20 if sys.platform == 'darwin' else maxrss / 2**10
+    except ImportError:
+        pass
+    return result
+
+# each measurement runs in a new process so that stages do not share memory or imported modules
+def measure_process(command, argv, trace = False):
+    with concurrent.futures.ProcessPoolExecutor(1, mp_context = multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(measure, command, argv, trace).result()
+
+# returns a synthetic data set reusing the one in the directory if it was generated with the same parameters
+def get_dataset(path, n, seed, ext):
+    desc = os.path.join(path, 'dataset.json')
+    if os.path.exists(desc):
+        with open(desc) as f:
+            dataset = json.load(f)
+        if (dataset['size'], dataset['seed'], os.path.splitext(dataset['files']['matches'])[1]) == (n, seed, ext):
+            return dataset
+    dataset = write_dataset(path, n, seed, ext)
+    with open(desc, 'w') as f:
+        json.dump(dataset, f, indent = 2)
+    return dataset
+
+# returns the measurements that got slower or used more memory than in the baseline by more than the tolerance
+def compare(results, baseline, tolerance):
+    base = {(result['stage'], result['size']): result for result in baseline['results']}
+    regressions = []
+    sys.stderr.write('stage'.ljust(16) + 'size'.rjust(8) + 'metric'.rjust(11) + 'baseline'.rjust(12) + 'current'.rjust(12) + 'ratio'.rjust(9) + '\n')
+    for result in results:
+        key = (result['stage'], result['size'])
+        if not key in base:
+            continue
+        for metric in 'seconds', 'maxrss_mb', 'peak_mb':
+            if metric in result and metric in base[key] and base[key][metric] > 0:
+                ratio = result[metric] / base[key][metric]
+                sys.stderr.write(result['stage'].ljust(16) + str(result['size']).rjust(8) + metric.rjust(11) + '%12.2f%12.2f%8.2fx' % (base[key][metric], result[metric], ratio) + '\n')
+                if ratio > 1 + tolerance:
+                    regressions.append((result['stage'], result['size'], metric, ratio))
+    return regressions
+
+def get_parser():
+    parser = argparse.ArgumentParser(description = 'Benchmark the processing subcommands on synthetic data (16 Aug 2018)', add_help = False, usage = 'getmydnamatches benchmark [options]')
+    parser.add_argument('-n', metavar = '<INT>', nargs = '+', type = int, default = [1000, 10000], help = 'numbers of individuals in the synthetic data sets [1000 10000]')
+    parser.add_argument('-x', metavar = '<STR>', nargs = '+', type = str, default = stages, choices = stages, help = 'stages to benchmark [all]')
+    parser.add_argument('-d', metavar = '<DIR>', type = str, default = 'benchmark.data', help = 'directory for the synthetic data sets [benchmark.data]')
+    parser.add_argument('-e', metavar = '<STR>', type = str, default = 'tsv', choices = ['tsv', 'parquet', 'feather'], help = 'format of the synthetic tables and graph files [tsv]')
+    parser.add_argument('-s', metavar = '<INT>', type = int, default = 0, help = 'random seed [0]')
+    parser.add_argument('-m', action = 'store_true', default = False, help = 'whether to also trace memory allocations in a separate run [False]')
+    parser.add_argument('-b', metavar = '<FILE>', type = str, help = 'baseline results to compare against')
+    parser.add_argument('-t', metavar = '<FLOAT>', type = float, default = .2, help = 'tolerated slowdown or memory increase relative to the baseline [0.2]')
+    try:
+        parser.add_argument('-o', metavar = '<FILE>', type = argparse.FileType('w', encoding = 'UTF-8'), default = sys.stdout, help = 'output results in JSON format [stdout]')
+    except TypeError:
+        sys.stderr.write('Python >= 3.4 is required to run this script\n')
+        sys.stderr.write('(see https://docs.python.org/3/whatsnew/3.4.html#argparse)\n')
+        exit(2)
+    return parser
+
+def main(argv = None):
+    parser = get_parser()
+
+    # extract arguments from the command line
+    try:
+        parser.error = parser.exit
+        args = parser.parse_args(argv)
+    except SystemExit:
+        parser.print_help()
+        exit(2)
+
+    ext = '.' + args.e
+    results = []
+    for n in args.n:
+        log('Generating synthetic data set with ' + str(n) + ' individuals')
+        dataset = get_dataset(os.path.join(args.d, str(n)), n, args.s, ext)
+        graph = os.path.join(args.d, str(n), 'graph' + ext)
+        for stage in [stage for stage in stages if stage in args.x]:
+            # graph files are written but not measured when only the stages reading them are benchmarked
+            if stage in graph_stages and not 'ancestry2graph' in args.x and not os.path.exists(graph):
+                measure_process('ancestry2graph', get_argv('ancestry2graph', dataset, ext))
+            result = measure_process(stage, get_argv(stage, dataset, ext))
+            if args.m:
+                result['peak_mb'] = measure_process(stage, get_argv(stage, dataset, ext), True)['peak_mb']
+            log(stage + ' on ' + str(n) + ' individuals: ' + ', '.join(key + ' ' + '%.2f' % value for key, value in result.items()))
+            results.append(dict({'stage': stage, 'size': n}, **result))
+
+    report = {'date': time.strftime("%Y-%m-%d %H:%M:%S"), 'python': platform.python_version(), 'platform': platform.platform(), 'processor': platform.processor(), 'format': args.e, 'seed': args.s, 'results': results}
+    json.dump(report, args.o, indent = 2)
+    args.o.write('\n')
+    args.o.flush()
+
+    if args.b:
+        with open(args.b) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.t)
+        for stage, size, metric, ratio in regressions:
+            sys.stderr.write('Warning: ' + stage + ' on ' + str(size) + ' individuals ' + metric + ' is ' + '%.2f' % ratio + ' times the baseline\n')
+        if regressions:
+            exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""
+   cli.py - Single entry point dispatching to the subcommands
+   Copyright (C) 2015-2018 Giulio Genovese (giulio.genovese@gmail.com)
+
+   This program is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+   Written by Giulio Genovese <giulio.genovese@gmail.com>
+"""
+
+import sys, importlib
+from . import commands
+
+def print_help():
+    sys.stderr.write('usage: getmydnamatches <subcommand> [options]\n\n')
+    sys.stderr.write('subcommands:\n')
+    for command, description in commands.items():
+        sys.stderr.write('  ' + command.ljust(20) + description + '\n')
+
+# only the module of the requested subcommand is imported
+def main(argv = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or not argv[0] in commands:
+        print_help()
+        exit(2)
+    importlib.import_module('.' + argv[0], __package__).main(argv[1:])
+
+if __name__ == '__main__':
+    main()
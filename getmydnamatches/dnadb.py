@@ -0,0 +1,238 @@
+"""
+   dnadb.py - Indexed local database of matches for shared match queries
+   Copyright (C) 2015-2018 Giulio Genovese (giulio.genovese@gmail.com)
+
+   This program is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+   Written by Giulio Genovese <giulio.genovese@gmail.com>
+"""
+
+import sys, argparse, sqlite3
+from .lazy import lazy_import
+from .dnaio import read_table, write_table
+from .profiler import profiler, add_argument, get_prefix
+from .dnagraph import get_columns
+
+pd = lazy_import('pandas')
+
+# edges are stored in both directions so that the neighbors of an individual are found from the primary key
+schema = '''
+CREATE TABLE IF NOT EXISTS people (id TEXT PRIMARY KEY, name TEXT, sex TEXT);
+CREATE TABLE IF NOT EXISTS edges (id1 TEXT NOT NULL, id2 TEXT NOT NULL, cm REAL, PRIMARY KEY (id1, id2)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS matches (kit TEXT NOT NULL, id TEXT NOT NULL, cm REAL, meiosis REAL, patside INTEGER, matside INTEGER, PRIMARY KEY (kit, id)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS matches_id ON matches (id);
+CREATE INDEX IF NOT EXISTS matches_cm ON matches (kit, cm);
+'''
+
+# newer crawls update older ones, edges keep the largest available centiMorgans as when merging kits
+upsert_people = 'INSERT INTO people VALUES (?, ?, ?) ON CONFLICT (id) DO UPDATE SET name = coalesce(excluded.name, name), sex = coalesce(excluded.sex, sex)'
+upsert_edges = 'INSERT INTO edges VALUES (?, ?, ?) ON CONFLICT (id1, id2) DO UPDATE SET cm = CASE WHEN cm IS NULL OR excluded.cm > cm THEN excluded.cm ELSE cm END'
+upsert_matches = 'INSERT INTO matches VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (kit, id) DO UPDATE SET cm = coalesce(excluded.cm, cm), meiosis = coalesce(excluded.meiosis, meiosis), patside = coalesce(excluded.patside, patside), matside = coalesce(excluded.matside, matside)'
+
+# maximum number of parameters in a single query for older versions of SQLite
+chunksize = 900
+
+# returns the rows of a table as tuples of python values with missing values as None
+def get_rows(df):
+    df = df.astype(object)
+    return df.where(df.notnull(), None).itertuples(index = False, name = None)
+
+# returns a column as 0 or 1 values, or missing values if the column is not available
+def get_flag(df, key):
+    return df[key].map({True: 1, False: 0, 'True': 1, 'False': 0}) if key in df else None
+
+class MatchDB:
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(schema)
+        # a larger page cache avoids thrashing when updating large indexes
+        self.conn.execute('PRAGMA cache_size = -262144')
+
+    def close(self):
+        self.conn.close()
+
+    # inserts or updates individuals and undirected edges from a graph file from ancestry2graph.py or ibdview2graph.py
+    def add_graph(self, df):
+        id1, id2, cm = get_columns(df)
+        name1, name2, sex1, sex2 = ('name_1', 'name_2', 'sex_1', 'sex_2') if 'name_1' in df else ('l1', 'l2', 'g1', 'g2')
+        people = pd.DataFrame({'id': pd.concat([df[id1], df[id2]]), 'name': pd.concat([df[name1], df[name2]]), 'sex': pd.concat([df[sex1], df[sex2]])})
+        # physical distances are not centiMorgans
+        w = df[cm].astype(float) if cm in ('seg_cm', 'cm') else pd.Series(float('nan'), index = df.index)
+        edges = pd.DataFrame({'id1': pd.concat([df[id1], df[id2]]), 'id2': pd.concat([df[id2], df[id1]]), 'cm': pd.concat([w, w])})
+        with self.conn:
+            self.conn.executemany(upsert_people, get_rows(people.drop_duplicates('id', keep = 'last')))
+            # inserting in primary key order appends to the index rather than scattering writes
+            self.conn.executemany(upsert_edges, get_rows(edges[edges['id1'] != edges['id2']].sort_values(['id1', 'id2'])))
+
+    # inserts or updates the matches of a kit, with their sharing and sides
+    def add_matches(self, kit, df):
+        df = df[df['id'] != kit]
+        matches = pd.DataFrame({'kit': kit, 'id': df['id'], 'cm': df['cm'].astype(float), 'meiosis': df['meiosis'].astype(float),
+                                'patside': get_flag(df, 'patside'), 'matside': get_flag(df, 'matside')})
+        with self.conn:
+            self.conn.executemany(upsert_matches, get_rows(matches))
+
+    # imports an AncestryDNA matches table from getmyancestrydna.py, a graph file, or a 23andMe matches table for a kit
+    def add_table(self, df, kit = None):
+        if 'testGuid' in df:
+            from .ancestry2graph import get_graph, get_owner
+            self.add_graph(get_graph([df]))
+            self.add_matches(get_owner(df), pd.DataFrame({'id': df['testGuid'], 'cm': df['sharedCentimorgans'], 'meiosis': df['meiosisValue'],
+                                                                   'patside': df.get('patside'), 'matside': df.get('matside')}))
+        elif 'human_id_1' in df or 'p1' in df:
+            self.add_graph(df)
+        elif 'human_id' in df:
+            if not kit:
+                raise ValueError('the kit of a 23andMe matches table is required')
+            from .relationships import rel_alg
+            meiosis = df['rel_alg'].map(rel_alg) if 'rel_alg' in df else float('nan')
+            self.add_matches(kit, pd.DataFrame({'id': df['human_id'], 'cm': float('nan'), 'meiosis': meiosis, 'patside': df.get('patside'), 'matside': df.get('matside')}))
+        else:
+            raise ValueError('unknown table format')
+
+    # returns the neighbors of a set of individuals as pairs of an individual and a neighbor
+    def get_neighbors(self, ids, min_cm = None):
+        ids, pairs = list(ids), []
+        for start in range(0, len(ids), chunksize):
+            chunk = ids[start:start + chunksize]
+            query = 'SELECT id1, id2 FROM edges WHERE id1 IN (' + ', '.join('?' * len(chunk)) + ')' + (' AND cm >= ?' if min_cm else '')
+            pairs += self.conn.execute(query, chunk + ([min_cm] if min_cm else [])).fetchall()
+        return pairs
+
+    # returns the individuals other than the owners of the kits sharing with all the given individuals with their sharing with the kits
+    # optionally only those sharing at least min_cm centiMorgans with a kit and on one side of the kit
+    def get_common(self, ids, min_cm = None, side = None, kit = None):
+        common = ' INTERSECT '.join(['SELECT id2 FROM edges WHERE id1 = ?'] * len(ids))
+        query = 'SELECT c.id2 AS id, p.name, p.sex, m.kit, m.cm, m.meiosis, m.patside, m.matside FROM (' + common + ') c ' + \
+                'LEFT JOIN people p ON p.id = c.id2 LEFT JOIN matches m ON m.id = c.id2' + (' AND m.kit = ?' if kit else '') + \
+                ' WHERE c.id2 NOT IN (' + ', '.join('?' * len(ids)) + ') AND c.id2 NOT IN (SELECT kit FROM matches)'
+        params = list(ids) + ([kit] if kit else []) + list(ids)
+        if min_cm:
+            query += ' AND m.cm >= ?'
+            params.append(min_cm)
+        if side:
+            query += ' AND m.' + {'pat': 'patside', 'mat': 'matside'}[side] + ' = 1'
+        return pd.read_sql_query(query + ' ORDER BY m.cm DESC, c.id2', self.conn, params = params)
+
+    # returns the matches of a kit sharing between min_cm and max_cm centiMorgans, optionally on one side only
+    def get_matches(self, kit, min_cm = None, max_cm = None, side = None):
+        query = 'SELECT m.id, p.name, p.sex, m.kit, m.cm, m.meiosis, m.patside, m.matside FROM matches m LEFT JOIN people p ON p.id = m.id WHERE m.kit = ?'
+        params = [kit]
+        if min_cm:
+            query += ' AND m.cm >= ?'
+            params.append(min_cm)
+        if max_cm:
+            query += ' AND m.cm <= ?'
+            params.append(max_cm)
+        if side:
+            query += ' AND m.' + {'pat': 'patside', 'mat': 'matside'}[side] + ' = 1'
+        return pd.read_sql_query(query + ' ORDER BY m.cm DESC, m.id', self.conn, params = params)
+
+    # returns a shortest path between two individuals with at most max_hops edges, searching from both ends at once
+    # individuals to exclude, such as the kits sharing with all their matches, are never crossed by the path
+    def get_path(self, a, b, max_hops = 4, min_cm = None, exclude = ()):
+        exclude = set(exclude) - {a, b}
+        parents = [{a: None}, {b: None}]
+        frontiers = [[a], [b]]
+        meet = a if a == b else None
+        for hop in range(max_hops):
+            if meet is not None or not frontiers[0] or not frontiers[1]:
+                break
+            # expand the smaller frontier
+            k = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            frontier = []
+            for node, neighbor in self.get_neighbors(frontiers[k], min_cm):
+                if not neighbor in parents[k] and not neighbor in exclude:
+                    parents[k][neighbor] = node
+                    frontier.append(neighbor)
+                    if neighbor in parents[1 - k] and meet is None:
+                        meet = neighbor
+            frontiers[k] = frontier
+        if meet is None:
+            return pd.DataFrame(columns = ['id', 'name', 'sex', 'cm'])
+        path, node = [], meet
+        while node is not None:
+            path.insert(0, node)
+            node = parents[0][node]
+        node = parents[1][meet]
+        while node is not None:
+            path.append(node)
+            node = parents[1][node]
+        people = pd.read_sql_query('SELECT id, name, sex FROM people WHERE id IN (' + ', '.join('?' * len(path)) + ')', self.conn, params = path).set_index('id')
+        cm = [self.conn.execute('SELECT cm FROM edges WHERE id1 = ? AND id2 = ?', pair).fetchone()[0] for pair in zip(path[:-1], path[1:])]
+        # the centiMorgans of each row are those shared with the next individual in the path
+        return pd.DataFrame({'id': path, 'name': people['name'].reindex(path).values, 'sex': people['sex'].reindex(path).values, 'cm': cm + [None]})
+
+def get_parser():
+    parser = argparse.ArgumentParser(description = 'Query an indexed local database of matches (16 Aug 2018)', add_help = False, usage = 'dnadb.py -d <database> [-i <table> ...] [query] [options]')
+    parser.add_argument('-d', metavar = '<FILE>', required = True, type = str, help = 'SQLite database file, created if missing')
+    parser.add_argument('-i', metavar = '<FILE>', nargs = '+', type = str, help = 'matches tables or graph files to insert or update')
+    parser.add_argument('-k', metavar = '<IID>', type = str, help = 'kit of the 23andMe matches tables to insert, or kit whose sharing to query')
+    parser.add_argument('-c', metavar = '<IID>', nargs = '+', type = str, help = 'list individuals sharing with all these individuals')
+    parser.add_argument('-t', action = 'store_true', default = False, help = 'whether to list the matches of the kit within the centiMorgans thresholds [False]')
+    parser.add_argument('-p', metavar = '<IID>', nargs = 2, type = str, help = 'find a shortest path of shared matches between two individuals')
+    parser.add_argument('-cm', metavar = '<FLOAT>', type = float, help = 'minimum number of centiMorgans')
+    parser.add_argument('-max', metavar = '<FLOAT>', type = float, help = 'maximum number of centiMorgans')
+    parser.add_argument('-s', metavar = '<STR>', type = str, choices = ['pat', 'mat'], help = 'side of the kit: pat or mat')
+    parser.add_argument('-x', metavar = '<IID>', nargs = '+', type = str, default = [], help = 'individuals paths cannot go through')
+    parser.add_argument('-hops', metavar = '<INT>', type = int, default = 4, help = 'maximum number of edges in paths [4]')
+    try:
+        parser.add_argument('-o', metavar = '<FILE>', type = argparse.FileType('w', encoding = 'UTF-8'), default = sys.stdout, help = 'output table [stdout]')
+    except TypeError:
+        sys.stderr.write('Python >= 3.4 is required to run this script\n')
+        sys.stderr.write('(see https://docs.python.org/3/whatsnew/3.4.html#argparse)\n')
+        exit(2)
+    add_argument(parser)
+    return parser
+
+def main(argv = None):
+    parser = get_parser()
+
+    # extract arguments from the command line
+    try:
+        parser.error = parser.exit
+        args = parser.parse_args(argv)
+        if args.t and not args.k:
+            parser.exit()
+    except SystemExit:
+        parser.print_help()
+        exit(2)
+
+    profiler.start('dnadb', args.profile, get_prefix(args.o, args.d))
+
+    profiler.mark('import')
+    db = MatchDB(args.d)
+    for f in args.i if args.i else []:
+        try:
+            db.add_table(read_table(f), args.k)
+        except ValueError as e:
+            sys.stderr.write('Error: cannot import ' + f + ': ' + str(e) + '\n')
+            exit(2)
+
+    profiler.mark('query')
+    if args.c:
+        df = db.get_common(args.c, args.cm, args.s, args.k)
+    elif args.t:
+        df = db.get_matches(args.k, args.cm, args.max, args.s)
+    elif args.p:
+        df = db.get_path(args.p[0], args.p[1], args.hops, args.cm, args.x)
+    db.close()
+    if args.c or args.t or args.p:
+        profiler.mark('write')
+        write_table(df, args.o)
+
+    profiler.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""
+   dnagraph.py - Sparse matrix operations on matches graphs
+   Copyright (C) 2015-2018 Giulio Genovese (giulio.genovese@gmail.com)
+
+   This program is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+   Written by Giulio Genovese <giulio.genovese@gmail.com>
+"""
+
+from .lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+sp = lazy_import('scipy.sparse')
+csgraph = lazy_import('scipy.sparse.csgraph')
+
+# returns the two id columns and the centiMorgan column of a graph file from ancestry2graph.py or ibdview2graph.py
+def get_columns(df):
+    if 'human_id_1' in df:
+        return 'human_id_1', 'human_id_2', 'seg_cm' if 'seg_cm' in df else None
+    return 'p1', 'p2', 'cm' if 'cm' in df else 'mb' if 'mb' in df else None
+
+# returns the edge weights with missing centiMorgans replaced by the median of the available ones
+def get_weights(df, cm = None):
+    if not cm or df[cm].isnull().all():
+        return np.ones(len(df))
+    w = df[cm].values.astype(float)
+    return np.where(np.isnan(w), np.nanmedian(w), w)
+
+# returns the node codes of the two ends of each edge and the node ids
+def get_codes(df):
+    id1, id2, cm = get_columns(df)
+    codes, ids = pd.factorize(pd.concat([df[id1], df[id2]], ignore_index = True))
+    return codes[:len(df)], codes[len(df):], pd.Index(ids)
+
+# returns the node ids and the symmetric sparse adjacency matrix of a graph file
+def get_adjacency(df, weighted = True):
+    id1, id2, cm = get_columns(df)
+    i, j, ids = get_codes(df)
+    w = get_weights(df, cm if weighted else None)
+    adj = sp.coo_matrix((np.concatenate([w, w]), (np.concatenate([i, j]), np.concatenate([j, i]))), shape = (len(ids), len(ids))).tocsr()
+    adj.sum_duplicates()
+    return ids, adj
+
+# returns a score in [0, 1] for each node measuring how strongly it is connected to the seed nodes
+# seeds have score 1 and at each hop every other node takes the weighted average score of its neighbors
+def propagate_side(adj, seeds, hops = 1):
+    deg = np.asarray(adj.sum(axis = 1)).ravel()
+    trans = sp.diags(1 / np.where(deg > 0, deg, 1)) @ adj
+    seeds = np.asarray(seeds, dtype = float)
+    score = seeds.copy()
+    for hop in range(hops):
+        score = np.maximum(seeds, trans @ score)
+    return score
+
+# returns a mask of the edges between nodes of the k-core, peeling nodes with fewer than k neighbors
+def kcore_edges(df, k):
+    i, j, ids = get_codes(df)
+    keep = i != j
+    while True:
+        deg = np.bincount(i[keep], minlength = len(ids)) + np.bincount(j[keep], minlength = len(ids))
+        idx = keep & (deg[i] >= k) & (deg[j] >= k)
+        if idx.sum() == keep.sum():
+            return keep
+        keep = idx
+
+# returns a mask of the edges between nodes within the given number of hops from the centers
+def ego_edges(df, centers, radius = 1):
+    ids, adj = get_adjacency(df, weighted = False)
+    reach = ids.isin(centers)
+    for hop in range(radius):
+        reach = reach | (adj @ reach.astype(float) > 0)
+    i, j, ids = get_codes(df)
+    return reach[i] & reach[j]
+
+# returns a mask of the edges that are among the k strongest edges of at least one of their ends
+def topk_edges(df, k):
+    id1, id2, cm = get_columns(df)
+    i, j, ids = get_codes(df)
+    w = get_weights(df, cm)
+    node = np.concatenate([i, j])
+    edge = np.tile(np.arange(len(df)), 2)
+    # sort the ends of the edges by node and decreasing weight and rank them within each node
+    order = np.lexsort((-np.concatenate([w, w]), node))
+    count = np.bincount(node, minlength = len(ids))
+    rank = np.arange(len(order)) - np.repeat(np.cumsum(count) - count, count)
+    keep = np.zeros(len(df), dtype = bool)
+    keep[edge[order[rank < k]]] = True
+    return keep
+
+# returns a mask of the edges in connected components with at least the given number of nodes
+def component_edges(df, size):
+    ids, adj = get_adjacency(df, weighted = False)
+    n, labels = csgraph.connected_components(adj, directed = False)
+    i, j, ids = get_codes(df)
+    return np.bincount(labels, minlength = n)[labels[i]] >= size
+
+# returns the modularity of a partition of the nodes of a weighted adjacency matrix
+def modularity(adj, labels, resolution = 1.0):
+    coo = adj.tocoo()
+    m2 = coo.data.sum()
+    if m2 == 0:
+        return 0.0
+    inner = np.bincount(labels[coo.row], weights = coo.data * (labels[coo.row] == labels[coo.col]), minlength = labels.max() + 1)
+    total = np.bincount(labels[coo.row], weights = coo.data, minlength = labels.max() + 1)
+    return (inner.sum() - resolution * (total ** 2).sum() / m2) / m2
+
+# moves nodes between communities to increase modularity, moving a random subset of nodes at a time
+# so that neighboring nodes do not keep swapping communities with each other
+def local_moving(adj, resolution, rng, max_iter = 100):
+    n = adj.shape[0]
+    deg = np.asarray(adj.sum(axis = 1)).ravel()
+    m2 = deg.sum()
+    if m2 == 0:
+        return np.arange(n)
+    offdiag = (adj - sp.diags(adj.diagonal())).tocsr()
+    comm = np.arange(n)
+    best = modularity(adj, comm, resolution)
+    frac = .5
+    for it in range(max_iter):
+        # weights between each node and each of its neighboring communities
+        onehot = sp.csr_matrix((np.ones(n), (np.arange(n), comm)), shape = (n, n))
+        kic = (offdiag @ onehot).tocsr()
+        kic.sum_duplicates()
+        if kic.nnz == 0:
+            break
+        rows = np.repeat(np.arange(n), np.diff(kic.indptr))
+        total = np.bincount(comm, weights = deg, minlength = n)
+        own = kic.indices == comm[rows]
+        gain = kic.data - resolution * deg[rows] * (total[kic.indices] - own * deg[rows]) / m2
+        stay = -resolution * deg * (total[comm] - deg) / m2
+        stay[rows[own]] = gain[own]
+        # first community with the largest gain for each node
+        nonempty = np.flatnonzero(np.diff(kic.indptr) > 0)
+        top = np.full(n, -np.inf)
+        top[nonempty] = np.maximum.reduceat(gain, kic.indptr[nonempty])
+        pos = np.flatnonzero(gain == top[rows])
+        nodes, first = np.unique(rows[pos], return_index = True)
+        target = comm.copy()
+        target[nodes] = kic.indices[pos[first]]
+        better = (top > stay + 1e-12) & (target != comm)
+        if not better.any():
+            break
+        comm2 = np.where(better & (rng.random(n) < frac), target, comm)
+        value = modularity(adj, comm2, resolution)
+        if value > best:
+            comm, best = comm2, value
+        else:
+            frac /= 2
+            if frac < 1e-3:
+                break
+    return np.unique(comm, return_inverse = True)[1]
+
+# returns a community for each node by Louvain modularity optimization with vectorized local moving
+def louvain(adj, resolution = 1.0, seed = 0, max_levels = 20):
+    if adj.shape[0] == 0:
+        return np.zeros(0, dtype = np.int64)
+    rng = np.random.default_rng(seed)
+    labels = np.arange(adj.shape[0])
+    adj = sp.csr_matrix(adj, dtype = float)
+    for level in range(max_levels):
+        comm = local_moving(adj, resolution, rng)
+        if comm.max() + 1 == adj.shape[0]:
+            break
+        labels = comm[labels]
+        # aggregate the nodes of each community into a single node
+        onehot = sp.csr_matrix((np.ones(len(comm)), (np.arange(len(comm)), comm)), shape = (len(comm), comm.max() + 1))
+        adj = (onehot.T @ adj @ onehot).tocsr()
+    # number the communities by decreasing size
+    size = np.bincount(labels)
+    rank = np.empty(len(size), dtype = np.int64)
+    rank[np.argsort(-size, kind = 'stable')] = np.arange(len(size))
+    return rank[labels]
@@ -0,0 +1,134 @@
+"""
+   dnaio.py - Reading and writing of the tables passed between scripts
+   Copyright (C) 2015-2018 Giulio Genovese (giulio.genovese@gmail.com)
+
+   This program is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+   Written by Giulio Genovese <giulio.genovese@gmail.com>
+"""
+
+import os, ast, json
+from .lazy import lazy_import
+
+pd = lazy_import('pandas')
+
+# table formats by file extension, files with any other extension are tab separated text
+formats = {'.parquet': 'parquet', '.pq': 'parquet', '.feather': 'feather', '.arrow': 'feather', '.tsv': 'tsv', '.txt': 'tsv'}
+
+# declared types of the columns of each kind of table passed between scripts, with each kind recognized by the columns
+# it always has, so that columns with the same name in other tables keep the types they are read with
+schemas = [
+    # AncestryDNA matches tables, where getmyancestrydna.py formerly wrote the list of shared segments as text
+    (['testGuid', 'meiosisValue'], {'testGuid': str, 'matchTestDisplayName': str, 'matchTestAdminDisplayName': str, 'subjectGender': str,
+                                    'sharedCentimorgans': float, 'sharedSegments': 'count', 'meiosisValue': float, 'matchesInCommon': str}),
+    # AncestryDNA ethnicity and segments tables, with dictionary encoded values repeated across matches
+    (['testGuid', 'group', 'region'], {'testGuid': str, 'group': 'category', 'region': 'category', 'percent': float}),
+    (['testGuid', 'kind'], {'testGuid': str, 'kind': 'category'}),
+    # 23andMe relatives and inheritance tables
+    (['human_id'], {'human_id': str}),
+    (['people_ids'], {'people_ids': str, 'people_labels': str}),
+    # graph files from ancestry2graph.py and ibdview2graph.py with their estimated relationships
+    (['human_id_1', 'human_id_2'], {'human_id_1': str, 'name_1': str, 'sex_1': str, 'human_id_2': str, 'name_2': str, 'sex_2': str,
+                                    'seg_cm': float, 'segments': float, 'meiosis': 'Int64', 'relationship': str, 'rel_prob': float,
+                                    'relationship_2': str, 'rel_prob_2': float, 'relationship_3': str, 'rel_prob_3': float}),
+    (['p1', 'p2'], {'p1': str, 'l1': str, 'g1': str, 'p2': str, 'l2': str, 'g2': str, 'mb': float, 'cm': float, 'segments': float,
+                    'meiosis': 'Int64', 'relationship': str, 'rel_prob': float, 'relationship_2': str, 'rel_prob_2': float,
+                    'relationship_3': str, 'rel_prob_3': float})]
+
+# ids and names are read as text in any table as they would otherwise be inferred as numbers when they look like numbers
+text_columns = {col: str for columns, schema in schemas for col, value in schema.items() if value is str}
+
+# returns the format of a file from its extension unless a format is requested
+def get_format(f, fmt = None):
+    if fmt:
+        return fmt
+    name = f if isinstance(f, str) else getattr(f, 'name', '')
+    return formats.get(os.path.splitext(str(name))[1].lower(), 'tsv')
+
+# binary formats are written to and read from the underlying buffer of files opened in text mode
+def get_buffer(f):
+    return f if isinstance(f, str) else getattr(f, 'buffer', f)
+
+def check_pyarrow():
+    lazy_import('pyarrow')
+
+# returns the declared types of the columns of a table from the first kind of table whose columns it has
+def get_schema(columns):
+    for keys, schema in schemas:
+        if all(key in columns for key in keys):
+            return schema
+    return dict()
+
+# returns the number of items of a value that is either a number or the text of a list, or NaN if it is neither
+def get_count(value):
+    try:
+        value = ast.literal_eval(value) if isinstance(value, str) else value
+        return float(len(value) if isinstance(value, (list, tuple)) else value)
+    except (ValueError, TypeError, SyntaxError):
+        return float('nan')
+
+# casts the columns of a table to their declared types keeping missing values
+def set_types(df):
+    schema = get_schema(df.columns)
+    cast = dict()
+    for col in df.columns:
+        if schema.get(col) is float and not pd.api.types.is_float_dtype(df[col]):
+            cast[col] = df[col].astype(float)
+        elif schema.get(col) == 'count' and not pd.api.types.is_float_dtype(df[col]):
+            cast[col] = df[col].astype(float) if pd.api.types.is_numeric_dtype(df[col]) else df[col].map(get_count, na_action = 'ignore').astype(float)
+        elif schema.get(col) == 'Int64' and df[col].dtype != 'Int64':
+            cast[col] = df[col].astype('Int64')
+        elif schema.get(col) == 'category' and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            cast[col] = df[col].astype('category')
+        elif schema.get(col) is str and not pd.api.types.is_string_dtype(df[col]) and not pd.api.types.is_object_dtype(df[col]):
+            cast[col] = df[col].astype(str).where(df[col].notnull())
+    return df.assign(**cast) if cast else df
+
+# returns a table that can be stored in a binary format, with values equal to the missing value string stored
+# as missing as they would be read back from text, nested values stored as JSON, and mixed columns stored as text
+def get_binary(df, na_rep = 'NA'):
+    cast = dict()
+    for col in df.columns[df.dtypes == object]:
+        values = df[col].where(df[col].notnull() & (df[col] != na_rep), None)
+        values = values.map(lambda x: json.dumps(x) if isinstance(x, (dict, list)) else x)
+        if pd.api.types.infer_dtype(values, skipna = True).startswith('mixed'):
+            values = values.map(lambda x: x if x is None else str(x))
+        cast[col] = values
+    return df.assign(**cast) if cast else df
+
+def read_table(f, fmt = None, sep = '\t', **kwargs):
+    fmt = get_format(f, fmt)
+    if fmt == 'tsv':
+        dtype = dict(text_columns)
+        dtype.update(kwargs.pop('dtype', {}))
+        return set_types(pd.read_csv(f, sep = sep, dtype = dtype, **kwargs))
+    check_pyarrow()
+    if fmt == 'parquet':
+        df = pd.read_parquet(get_buffer(f), columns = kwargs.get('usecols'))
+    else:
+        df = pd.read_feather(get_buffer(f), columns = kwargs.get('usecols'))
+    return set_types(df)
+
+def write_table(df, f, fmt = None, index = False, na_rep = 'NA', columns = None):
+    fmt = get_format(f, fmt)
+    if fmt == 'tsv':
+        df.to_csv(f, sep = '\t', na_rep = na_rep, index = index, columns = columns)
+        return
+    check_pyarrow()
+    df = df.reset_index() if index else df.reset_index(drop = True)
+    df = set_types(get_binary(df if columns is None else df[columns], na_rep))
+    if fmt == 'parquet':
+        df.to_parquet(get_buffer(f), index = False)
+    else:
+        df.to_feather(get_buffer(f))
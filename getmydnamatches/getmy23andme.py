@@ -0,0 +1,253 @@
+"""
+   getmy23andme.py - Retrieve DNA matches information from 23andMe
+   Copyright (C) 2015-2018 Giulio Genovese (giulio.genovese@gmail.com)
+
+   This program is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+   Written by Giulio Genovese <giulio.genovese@gmail.com>
+"""
+
+import sys, argparse, getpass, re, json, html, itertools, asyncio
+from io import StringIO
+from .lazy import lazy_import
+from .session import Session as BaseSession
+from .dnaio import write_table
+from .profiler import profiler, add_argument
+
+pd = lazy_import('pandas')
+
+class Session(BaseSession):
+    def __init__(self, username, password, verbose, logfile, timeout):
+        super().__init__(verbose, logfile, timeout)
+        self.username = username
+        self.password = password
+        self.maxretry = 10
+        self.login()
+
+    def login(self):
+        url = 'https://auth.23andme.com/login/'
+        r = self.request('GET', url)
+
+        # extract csrftoken
+        csrftoken = self.get_cookies()['csrftoken']
+        # extract csrfmiddlewaretoken
+        text = r.text
+        regexp = re.compile('name=\"csrfmiddlewaretoken\" value=\".*\"')
+        res = regexp.search(text)
+        csrfmiddlewaretoken = text[res.span()[0]+34:res.span()[1]-1]
+        data = { 'csrfmiddlewaretoken': csrfmiddlewaretoken, 'username': self.username, 'password': self.password }
+        # set header to avoid receiving a 403 response
+        headers = { 'referer': url }
+
+        self.request('POST', url, cookies = { 'csrftoken': csrftoken }, data = data, headers = headers)
+        self.cookies = { 'sessionid': self.get_cookies()['sessionid'] }
+        self.retry = 0
+
+    def get_url(self, url, xhr = False, data = None):
+        headers = { 'X-Requested-With': 'XMLHttpRequest' } if xhr else None
+        while True:
+            if self.retry > self.maxretry:
+                self.login() # here it should also switch back to the previous profile
+            if data:
+                r = self.request('POST', url, cookies = self.cookies, data = data, headers = headers)
+            else:
+                r = self.request('GET', url, cookies = self.cookies, headers = headers)
+            if r.status_code == 403:
+                return None
+            if self.http_error(r, url):
+                continue
+            text = html.unescape(r.text)
+            if r.text == '191919':
+                self.log(url + ' 191919', force = True)
+                self.retry += 1
+                continue
+            else:
+                return text
+
+    # this function retrieves the list of profiles from the https://www.23andme.com/you/ page
+    # (maybe there is a more direct way to request this list but I could not figure it out)
+    def get_account(self):
+        text = self.get_url('https://www.23andme.com/you/')
+        text = html.unescape(re.sub(' *\n *', '', text))
+
+#        regexp = re.compile(r'dataLayer = \[.*?\];')
+#        res = regexp.search(text)
+#        line = text[res.span()[0]:res.span()[1]]
+#        dataLayer = json.loads(line[12:-1])
+
+        regexp = re.compile(r'new exports.quickInviteModal\(\[\{.*?\}\],"' + '[0-f]'*16 + r'"\);new')
+        res = regexp.search(text)
+        line = text[res.span()[0]+29:res.span()[1]-24]
+        profile_data = json.loads(line)
+        return profile_data
+
+    # download list of connections
+    def get_connections(self):
+        text = self.get_url('https://you.23andme.com/tools/your-connections/connection/?limit=1000&offset=0', True)
+        return json.loads(text)
+
+    # switch profile
+    def switch_profile(self, profile_id):
+        self.get_url('https://you.23andme.com/switch-profile/?profile-id=' + profile_id)
+        return
+
+    # download list of profiles
+    def get_profiles(self):
+        text = self.get_url('https://you.23andme.com/tools/relatives/dna/ajax/?limit=1000&offset=0')
+        return json.loads(text)
+
+    # download list of relatives
+    def get_relatives(self):
+        text = self.get_url('https://you.23andme.com/tools/relatives/ajax/?limit=2000&offset=0')
+        if text:
+            return json.loads(text)
+        else:
+            return None
+
+    # download aggregate data with all relatives
+    def get_aggregate(self):
+        text = self.get_url('https://you.23andme.com/tools/relatives/download/')
+        return StringIO(text)
+
+    # download list of relatives shared with a match
+    def get_relatives_in_common(self, match_id):
+        text = self.get_url('https://you.23andme.com/tools/compare/match/relatives_in_common/?remote_id=' + match_id + '&limit=1000&offset=0')
+        return json.loads(text)
+
+    # download pairwise IBD information
+    def get_ibd(self, human_id_1, human_id_2):
+        text = self.get_url('https://you.23andme.com/tools/ibd/?human_id_1=' + human_id_1 + '&human_id_2=' + human_id_2)
+        return json.loads(text)
+
+def get_parser():
+    parser = argparse.ArgumentParser(description = 'Retrieve DNA matches from 23andMe (16 Aug 2018)', add_help = False, usage = 'getmy23andme.py -u <username> -p <password> [options]')
+    parser.add_argument('-u', metavar = '<STR>', type = str, help = '23andMe username [prompt]')
+    parser.add_argument('-p', metavar = '<STR>', type = str, help = '23andMe password [prompt]')
+    parser.add_argument('-v', action = 'store_false', default = True, help = 'whether to use verbose mode [True]')
+    parser.add_argument('-t', metavar = '<INT>', type = int, default = 60, help = 'timeout in seconds [60]')
+    parser.add_argument('-o', metavar = '<STR>', type = str, help = 'output prefix [account_id]')
+    parser.add_argument('-x', action = 'store_true', default = False, help = 'whether to download inheritance and ibdview tables [False]')
+    parser.add_argument('-e', metavar = '<STR>', type = str, default = 'tsv', choices = ['tsv', 'parquet', 'feather'], help = 'output tables format: tsv, parquet, or feather [tsv]')
+    parser.add_argument('-l', metavar = '<FILE>', type = argparse.FileType('w', encoding = 'UTF-8'), default = sys.stderr, help = 'output log file [stderr]')
+    add_argument(parser)
+    return parser
+
+def main(argv = None):
+    parser = get_parser()
+
+    # extract arguments from the command line
+    try:
+        parser.error = parser.exit
+        args = parser.parse_args(argv)
+    except SystemExit:
+        parser.print_help()
+        exit(2)
+
+    username = args.u if args.u else input("Enter 23andMe username: ")
+    password = args.p if args.p else getpass.getpass("Enter 23andMe password: ")
+    verbose = args.v
+    logfile = args.l
+    timeout = args.t
+    out = args.o if args.o else 'out' # dataLayer[0]['account_id']
+    profiler.start('getmy23andme', args.profile, out)
+
+    # initialize a session with 23andMe server
+    with profiler.stage('login'):
+        session = Session(username, password, verbose, logfile, timeout)
+
+    # download list of profiles owned by the account
+    with profiler.stage('pagination'):
+        data = session.get_account()
+    df = pd.DataFrame(data)
+    with profiler.stage('write'):
+        write_table(df[['id', 'sex', 'first_name', 'last_name']], out + '.' + args.e)
+    ehids = df['id']
+
+    with profiler.stage('pagination'):
+        data = session.get_connections()
+    df = pd.DataFrame(data['data'])
+    connections = set(df['profile_id'])
+    with profiler.stage('write'):
+        write_table(df, out + '.connections.' + args.e)
+
+    # generate a loop executor in case IBD information is requested
+    if args.x:
+        pairs = set()
+        loop = asyncio.new_event_loop()
+
+    # download list of relatives
+    for ehid in ehids:
+        with profiler.stage('pagination'):
+            session.switch_profile(ehid)
+            data = session.get_profiles()
+        df = pd.DataFrame(data['profiles'])
+        with profiler.stage('write'):
+            write_table(df, out + '.' + ehid + '.profiles.' + args.e)
+        
+        with profiler.stage('pagination'):
+            data = session.get_aggregate()
+        df = pd.read_csv(data)
+        with profiler.stage('write'):
+            write_table(df, out + '.' + ehid + '.aggregate.' + args.e)
+
+        with profiler.stage('pagination'):
+            data = session.get_relatives()
+        if data:
+            df = pd.DataFrame(data['relatives'])
+            with profiler.stage('write'):
+                write_table(df, out + '.' + ehid + '.relatives.' + args.e)
+
+        # download list of IBD pairs
+        if args.x and data:
+            idx = (df['new_share_status']!='NONE') & (df['new_share_status']!='PRE_YOUDOT_ANON') & (df['new_share_status']!='PRE_YOUDOT_PUBLIC')
+            match_ids = df[idx]['match_id']
+            session.log('Downloading ' + str(len(match_ids)) + ' DNA matches', force = True)
+            pairs |= {(x[0], x[1]) if x[0]<x[1] else (x[1], x[0]) for x in zip(itertools.repeat(ehid), df[idx]['human_id'])}
+            async def donwload_relatives_in_common(loop):
+                futures = [loop.run_in_executor(None, session.get_relatives_in_common, match_id) for match_id in match_ids]
+                for future in futures:
+                    await future
+                return futures
+            # requests run in threads, so the stage covers all of them rather than each one
+            with profiler.stage('icw'):
+                futures = loop.run_until_complete(donwload_relatives_in_common(loop))
+            with profiler.stage('table'):
+                for future in futures:
+                    df = pd.DataFrame(future.result()['relatives_in_common'])
+                    if df.empty: continue
+                    idx = df['is_open_sharing'] | df['owner_ehid'].isin(connections)
+                    df = df[idx][['local_ehid', 'owner_ehid', 'remote_ehid']]
+                    for (a, b) in [('local_ehid', 'owner_ehid'), ('local_ehid', 'remote_ehid'), ('owner_ehid', 'remote_ehid')]:
+                        pairs |= {(x[0], x[1]) if x[0]<x[1] else (x[1], x[0]) for x in zip(df[a], df[b]) if x[0] and x[1]}
+
+    # download pairwise IBD sharing
+    if args.x:
+        session.log('Downloading ' + str(len(pairs)) + ' IBD matches', force = True)
+        async def donwload_ibd(loop):
+            futures = [loop.run_in_executor(None, session.get_ibd, pair[0], pair[1]) for pair in pairs]
+            for future in futures:
+                await future
+            return futures
+        with profiler.stage('ibd'):
+            futures = loop.run_until_complete(donwload_ibd(loop))
+        with profiler.stage('table'):
+            ibd = [y for x in futures for y in x.result()]
+            df = pd.DataFrame(ibd)
+        with profiler.stage('write'):
+            write_table(df, out + '.ibd.' + args.e)
+
+    profiler.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,290 @@
+"""
+   getmyancestrydna.py - Retrieve DNA matches information from AncestryDNA
+   Copyright (C) 2015-2018 Giulio Genovese (giulio.genovese@gmail.com)
+
+   This program is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+   Written by Giulio Genovese <giulio.genovese@gmail.com>
+"""
+
+import sys, argparse, getpass, time, re, json
+from .lazy import lazy_import
+from .session import Session as BaseSession
+from .dnaio import write_table
+from .profiler import profiler, add_argument
+
+pd = lazy_import('pandas')
+requests = lazy_import('requests')
+
+class Session(BaseSession):
+    def __init__(self, username, password, verbose, logfile, timeout, urlpfx = 'https://www.ancestry.com/dna/secure/'):
+        super().__init__(verbose, logfile, timeout)
+        self.username = username
+        self.password = password
+        self.urlpfx = urlpfx
+        # self.dnaVersion = self.get_dna_version()
+        self.login()
+
+    # AncestryDNA log lines name the url when it is downloaded rather than on every line
+    def log(self, text, force = False):
+        if self.verbose or force:
+            self.logfile.write('[' + time.strftime("%Y-%m-%d %H:%M:%S") + ']: ' + text + '\n')
+
+    def log_start(self, url):
+        self.log('Downloading: ' + url)
+
+    def log_event(self, url, text):
+        self.log(text)
+
+    def log_status(self, url, status_code):
+        self.log('Status code: ' + str(status_code))
+
+    # This does not seem required anymore
+    def get_dna_version(self):
+        url = 'http://www.ancestry.com/dna/'
+        while True:
+            r = self.request('GET', url)
+            if self.http_error(r, url):
+                continue
+            text = re.findall(r'var dna.*?=\s*(.*?);', r.text, re.DOTALL | re.MULTILINE)[0] # http://stackoverflow.com/questions/18368058/how-can-i-parse-javascript-variables-using-python
+            text = re.sub('([a-zA-Z0-9]*) ?: ?({|\'|true|false|!1)', '"\\g<1>": \\g<2>', text) # enclose property names in double quotes
+            text = re.sub(r'/\*.*\*/', '', text) # remove comments
+            text = re.sub('\'(.*)\'', '"\\g<1>"', text) # change single quotes to double quotes
+            try:
+                dna = json.loads(text)
+                return dna['app']['version']
+            except:
+                if self.verbose:
+                    self.logfile.write(r.text + '\n')
+                time.sleep(self.timeout)
+                self.s = requests.Session() # sometimes the session will repeatedly fail and will need to be reset
+
+    def login(self):
+        url = 'https://www.ancestry.com/secure/login'
+        data = { 'username': self.username, 'password': self.password}
+        with profiler.stage('login'):
+            self.request('POST', url, data = data)
+        self.cookies = { 'ATT': self.get_cookies()['ATT'] }
+
+    def get_url(self, url):
+        while True:
+            # headers = { 'dnaVersion' : self.dnaVersion }
+            r = self.request('GET', url, cookies = self.cookies)
+            if r.status_code == 503:
+                time.sleep(self.timeout)
+                continue
+            if r.status_code == 426:
+                self.log('dnaVersion version became outdated during download')
+                self.dnaVersion = self.get_dna_version()
+                continue
+            if self.verbose:
+                self.logfile.write(r.text + '\n')
+            return r.json() if r.text else r.text
+
+    def get_tests(self):
+        url = self.urlpfx + 'tests'
+        tests = self.get_url(url)
+        return tests
+
+    def get_testinfo(self, guid):
+        url = self.urlpfx + 'testSettings/' + guid + '/testInfo'
+        testinfo = self.get_url(url)
+        return testinfo
+
+    def get_matches(self, guid, guidMatch = None):
+        with profiler.stage('icw' if guidMatch else 'pagination'):
+            pages = self.get_pages(guid, guidMatch)
+        return [match for page in pages for group in page['matchGroups'] for match in group['matches']]
+
+    def get_pages(self, guid, guidMatch = None):
+        page = 1
+        pages = list()
+        while True:
+            if guidMatch:
+                # url = 'http://dna.ancestry.com/secure/tests/' + guid + '/matches?relationGuid=' + testGuid + '&page=' + str(page)
+                url = self.urlpfx + 'tests/' + guid + '/matchesInCommon?matchTestGuid=' + guidMatch + '&page=' + str(page)
+            else:
+                url = self.urlpfx + 'tests/' + guid + '/matches?page=' + str(page)
+            matches = self.get_url(url)
+            pages.append(matches)
+            # if page < matches['pageCount']:
+            if len(matches['matchGroups']) > 0:
+                page += 1
+            else:
+                break
+        return pages
+
+    def get_match_info(self, guid, testGuid):
+        url = self.urlpfx + 'tests/' + guid + '/matches/' + testGuid
+        with profiler.stage('extras'):
+            matchInfo = self.get_url(url)
+        return matchInfo
+
+    def get_match_ethnicity(self, guid, testGuid):
+        url = self.urlpfx + 'tests/' + guid + '/matches/' + testGuid + '/ethnicity'
+        with profiler.stage('extras'):
+            ethnicity = self.get_url(url)
+        return ethnicity
+
+    def get_parents(self, guid):
+        url = self.urlpfx + 'tests/' + guid + '/parents'
+        parents = self.get_url(url)
+        return parents
+
+# returns the rows of the ethnicity table of a match, one per group and region, where each group is either
+# a list of regions, a list of objects with a region and a percentage, or a dictionary of percentages by region
+def get_ethnicity_rows(testGuid, ethnicity):
+    rows = list()
+    for group, values in ethnicity.items():
+        if isinstance(values, dict):
+            values = [{'region': key, 'percent': value} for key, value in values.items()]
+        for value in values if isinstance(values, list) else []:
+            if isinstance(value, dict):
+                region = value.get('key', value.get('region'))
+                percent = value.get('percent', value.get('percentage'))
+                rows.append((testGuid, group, region, percent))
+            else:
+                rows.append((testGuid, group, value, None))
+    return rows
+
+# returns the rows of the segments table of a match, one per item of its cadGroups and sharedSegments lists
+def get_segment_rows(testGuid, matchInfo):
+    rows = list()
+    for kind in ['cadGroups', 'sharedSegments']:
+        for value in matchInfo.get(kind) if isinstance(matchInfo.get(kind), list) else []:
+            row = {'testGuid': testGuid, 'kind': kind}
+            row.update(value if isinstance(value, dict) else {'value': value})
+            rows.append(row)
+    return rows
+
+# returns the long ethnicity table with dictionary encoded groups and regions
+def get_ethnicity_table(rows):
+    df = pd.DataFrame(rows, columns = ['testGuid', 'group', 'region', 'percent'])
+    return df.astype({'group': 'category', 'region': 'category', 'percent': float})
+
+# returns the segments table with nested fields flattened and a type inferred for each field
+def get_segments_table(rows):
+    if not rows:
+        return pd.DataFrame(columns = ['testGuid', 'kind'])
+    df = pd.json_normalize(rows).convert_dtypes()
+    df['kind'] = df['kind'].astype('category')
+    return df
+
+def get_parser():
+    parser = argparse.ArgumentParser(description = 'Retrieve DNA matches from AncestryDNA (16 Aug 2018)', add_help = False, usage = 'getmyancestrydna.py -u <username> -p <password> [options]')
+    parser.add_argument('-u', metavar = '<STR>', type = str, help = 'AncestryDNA username [prompt]')
+    parser.add_argument('-p', metavar = '<STR>', type = str, help = 'AncestryDNA password [prompt]')
+    parser.add_argument('-x', action = 'store_true', default = False, help = 'whether to download the list of shared matches, ethnicities, and segments [False]')
+    parser.add_argument('-v', action = 'store_false', default = True, help = 'whether to use verbose mode [True]')
+    parser.add_argument('-t', metavar = '<INT>', type = int, default = 60, help = 'timeout in seconds [60]')
+    parser.add_argument('-o', metavar = '<STR>', type = str, help = 'output prefix [ucdmId]')
+    parser.add_argument('-e', metavar = '<STR>', type = str, default = 'tsv', choices = ['tsv', 'parquet', 'feather'], help = 'output tables format: tsv, parquet, or feather [tsv]')
+    add_argument(parser)
+    try:        
+        parser.add_argument('-l', metavar = '<FILE>', type = argparse.FileType('w', encoding = 'UTF-8'), default = sys.stderr, help = 'output log file [stderr]')
+    except TypeError:
+        sys.stderr.write('Python >= 3.4 is required to run this script\n')
+        sys.stderr.write('(see https://docs.python.org/3/whatsnew/3.4.html#argparse)\n')
+        exit(2)
+    return parser
+
+def main(argv = None):
+    parser = get_parser()
+
+    # extract arguments from the command line
+    try:
+        parser.error = parser.exit
+        args = parser.parse_args(argv)
+    except SystemExit:
+        parser.print_help()
+        exit(2)
+
+    username = args.u if args.u else input("Enter AncestryDNA username: ")
+    password = args.p if args.p else getpass.getpass("Enter AncestryDNA password: ")
+    extra = args.x
+    verbose = args.v
+    logfile = args.l
+    timeout = args.t
+    outfile = args.o
+
+    # the report is named after the output prefix once it is known
+    profiler.start('getmyancestrydna', args.profile, outfile if outfile else 'getmyancestrydna')
+
+    # initialize a session with AncestryDNA server
+    session = Session(username, password, verbose, logfile, timeout)
+
+    # download list of tests handled in the account
+    tests = session.get_tests()
+    out = outfile if outfile else tests['data']['completeTests'][0]['testAdminUcdmId']
+    profiler.prefix = out
+    keys = ['shippedToLabOn', 'activationCode', 'activatedOn', 'role', 'state', 'lastUpdated', 'processingBegan', 'testAdminDisplayName', 'testAdminUcdmId', 'usersSelfTest', 'recollectable', 'adminDisplayName', 'privateName', 'gender', 'surname', 'ucdmId', 'givenNames', 'notificationCount', 'selfTest', 'guid']
+    df_tests = pd.DataFrame(columns = keys)
+    for test in tests['data']['completeTests']:
+        for key, value in test.items():
+            if key == 'testSubject':
+                for key2, value2 in value.items():
+                    df_tests.at[test['guid'], key2] = value2
+            else:
+                df_tests.at[test['guid'], key] = value
+    with profiler.stage('write'):
+        write_table(df_tests, out + '.' + args.e)
+
+    # download match details for each test
+    for guid in df_tests['guid']:
+        parents = session.get_parents(guid)
+        testinfo = session.get_testinfo(guid)
+        matches = session.get_matches(guid)
+        keys = ['dnaMatch', 'lastLoggedInDate', 'megaBases', 'ignored', 'testGuid', 'hasHint', 'starred', 'matchTreeId', 'matchTreeNodeCount', 'matchTestAdminDisplayName', 'hasNote', 'userPhoto', 'sharedCentimorgans', 'matchTreeDisplayName', 'matchTestDisplayName', 'matchTreeIsPrivate', 'meiosisValue', 'matchTestSubjectIsAdmin', 'note', 'subjectGender', 'viewed', 'confidence', 'relativeDate', 'sharedSegments', 'hideManagedByInfo']
+        df = pd.DataFrame(index = [match['testGuid'] for match in matches], columns = keys)
+        if extra:
+            df.at[guid, 'patside'] = True
+            df.at[guid, 'matside'] = True
+            ethnicities, segments = list(), list()
+        df.at[guid, 'testGuid'] = guid
+        df.at[guid, 'matchTestDisplayName'] = testinfo['givenNames'] + ' ' + testinfo['surname']
+        df.at[guid, 'subjectGender'] = testinfo['gender']
+        df.at[guid, 'meiosisValue'] = 0
+        df.at[guid, 'hasHint'] = True
+        df.at[guid, 'matchTestSubjectIsAdmin'] = True
+        for match in matches:
+            with profiler.stage('table'):
+                for key, value in match.items():
+                    if not key in keys:
+                        raise Exception('Key ' + key + ' missing from data frame table')
+                    df.at[match['testGuid'], key] = value
+            if extra:
+                ethnicity = session.get_match_ethnicity(guid, match['testGuid'])
+                # ethnicities and segments go to their own tables rather than to one column per key
+                if ethnicity:
+                    ethnicities += get_ethnicity_rows(match['testGuid'], ethnicity)
+                matchInfo = session.get_match_info(guid, match['testGuid'])
+                segments += get_segment_rows(match['testGuid'], matchInfo)
+                count = matchInfo['sharedSegments']
+                df.at[match['testGuid'], 'sharedSegments'] = len(count) if isinstance(count, list) else count if count else 0
+                matchesInCommon = session.get_matches(guid, match['testGuid'])
+                shared = [match['testGuid'] for match in matchesInCommon]
+                df.at[match['testGuid'], 'patside'] = parents['father']['testGuid'] in shared
+                df.at[match['testGuid'], 'matside'] = parents['mother']['testGuid'] in shared
+                df.at[match['testGuid'], 'matchesInCommon'] = ','.join(shared) if shared else 'NA'
+                
+        with profiler.stage('write'):
+            write_table(df, out + '.' + guid + '.' + args.e)
+            if extra:
+                write_table(get_ethnicity_table(ethnicities), out + '.' + guid + '.ethnicity.' + args.e)
+                write_table(get_segments_table(segments), out + '.' + guid + '.segments.' + args.e)
+
+    profiler.stop()
+
+if __name__ == '__main__':
+    main()
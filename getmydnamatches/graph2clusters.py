@@ -0,0 +1,86 @@
+"""
+   graph2clusters.py - Cluster shared matches from graph file
+   Copyright (C) 2015-2018 Giulio Genovese (giulio.genovese@gmail.com)
+
+   This program is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+   Written by Giulio Genovese <giulio.genovese@gmail.com>
+"""
+
+import sys, argparse
+from .lazy import lazy_import
+from .dnaio import read_table, write_table
+from .profiler import profiler, add_argument, get_prefix
+from .dnagraph import get_columns, get_adjacency, louvain
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# returns a table with the cluster of each individual of a graph file
+def get_clusters(df, exclude = None, min_cm = None, weighted = True, resolution = 1.0, seed = 0):
+    id1, id2, cm = get_columns(df)
+    name1, name2 = ('name_1', 'name_2') if 'name_1' in df else ('l1', 'l2')
+    if exclude:
+        df = df[~df[id1].isin(exclude) & ~df[id2].isin(exclude)]
+    if min_cm and cm:
+        df = df[df[cm].isnull() | (df[cm] > min_cm)]
+
+    ids, adj = get_adjacency(df, weighted = weighted)
+    cluster = louvain(adj, resolution, seed)
+    names = pd.concat([pd.Series(df[name1].values, index = df[id1]), pd.Series(df[name2].values, index = df[id2])])
+    names = names[~names.index.duplicated()]
+    out = pd.DataFrame({'human_id': ids, 'name': names.reindex(ids).values, 'cluster': cluster, 'size': np.bincount(cluster)[cluster]})
+    return out.sort_values(['cluster', 'human_id'])
+
+def get_parser():
+    parser = argparse.ArgumentParser(description = 'Cluster shared matches from graph file (16 Aug 2018)', add_help = False, usage = 'graph2clusters.py -i <graph> [options]')
+    parser.add_argument('-x', metavar = '<IID>', nargs = '+', type = str, help = 'list of individuals to exclude, such as the owners of the kits')
+    parser.add_argument('-cm', metavar = '<FLOAT>', type = float, help = 'minimum number of centiMorgans')
+    parser.add_argument('-u', action = 'store_true', default = False, help = 'whether to ignore centiMorgans as edge weights [False]')
+    parser.add_argument('-r', metavar = '<FLOAT>', type = float, default = 1.0, help = 'modularity resolution, larger values give smaller clusters [1.0]')
+    parser.add_argument('-s', metavar = '<INT>', type = int, default = 0, help = 'random seed [0]')
+    try:
+        parser.add_argument('-i', metavar = '<FILE>', type = argparse.FileType('r', encoding = 'UTF-8'), default = sys.stdin, help = 'input graph file [stdin]')
+        parser.add_argument('-o', metavar = '<FILE>', type = argparse.FileType('w', encoding = 'UTF-8'), default = sys.stdout, help = 'output cluster table [stdout]')
+    except TypeError:
+        sys.stderr.write('Python >= 3.4 is required to run this script\n')
+        sys.stderr.write('(see https://docs.python.org/3/whatsnew/3.4.html#argparse)\n')
+        exit(2)
+    add_argument(parser)
+    return parser
+
+def main(argv = None):
+    parser = get_parser()
+
+    # extract arguments from the command line
+    try:
+        parser.error = parser.exit
+        args = parser.parse_args(argv)
+    except SystemExit:
+        parser.print_help()
+        exit(2)
+
+    profiler.start('graph2clusters', args.profile, get_prefix(args.o, 'graph2clusters'))
+
+    profiler.mark('read')
+    df = read_table(args.i)
+    profiler.mark('clusters')
+    out = get_clusters(df, args.x, args.cm, not args.u, args.r, args.s)
+    profiler.mark('write')
+    write_table(out, args.o)
+
+    profiler.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+"""
+   graph2matrix.py - Convert AncestryDNA/23andMe matches graph to matrix
+   Copyright (C) 2015-2018 Giulio Genovese (giulio.genovese@gmail.com)
+
+   This program is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+   Written by Giulio Genovese <giulio.genovese@gmail.com>
+"""
+
+import sys, argparse
+from .lazy import lazy_import
+from .dnaio import read_table, write_table
+from .relationships import rel_alg
+from .profiler import profiler, add_argument, get_prefix
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+xml_types = {'label': 'string', 'sex': 'string', 'meiosis': 'int', 'patside': 'boolean', 'matside': 'boolean', 'mb': 'double', 'cm': 'double', 'seg_cm': 'double', 'weight': 'double',
+             'segments': 'int', 'relationship': 'string', 'rel_prob': 'double', 'relationship_2': 'string', 'rel_prob_2': 'double',
+             'relationship_3': 'string', 'rel_prob_3': 'double'}
+
+# returns the row, column, and value arrays of the lower triangle of the sharing matrix
+def get_coo(df, columns, iid, shared):
+    index = pd.Index(columns)
+    i1 = index.get_indexer(df[iid + '1'])
+    i2 = index.get_indexer(df[iid + '2'])
+    for i in np.flatnonzero(i1 < 0):
+        sys.stderr.write('Warning: ' + str(df['l1'].iloc[i]) + ', ' + str(df['p1'].iloc[i]) + ' not in input inheritance file\n')
+    for i in np.flatnonzero((i1 >= 0) & (i2 < 0)):
+        sys.stderr.write('Warning: ' + str(df['l2'].iloc[i]) + ', ' + str(df['p2'].iloc[i]) + ' not in input inheritance file\n')
+    idx = (i1 >= 0) & (i2 >= 0)
+    values = df[shared].values.astype(float) if shared else np.ones(len(df))
+    coo = pd.DataFrame({'row': np.maximum(i1, i2)[idx], 'col': np.minimum(i1, i2)[idx], 'value': values[idx]})
+    # later edges overwrite earlier edges between the same pair
+    coo = coo.drop_duplicates(['row', 'col'], keep = 'last')
+    return coo['row'].values, coo['col'].values, coo['value'].values
+
+def write_dense(f, columns, row, col, value, sep):
+    mat = np.zeros((len(columns), len(columns)))
+    mat[row, col] = value
+    mat[col, row] = value
+    pd.DataFrame(mat, index = columns, columns = columns).to_csv(f, sep = sep, na_rep = 'NA')
+
+def write_mtx(f, columns, row, col, value):
+    f.write('%%MatrixMarket matrix coordinate real symmetric\n')
+    for i, column in enumerate(columns):
+        f.write('% ' + str(i + 1) + ' ' + str(column) + '\n')
+    f.write(str(len(columns)) + ' ' + str(len(columns)) + ' ' + str(len(value)) + '\n')
+    pd.DataFrame({'row': row + 1, 'col': col + 1, 'value': value}).to_csv(f, sep = ' ', na_rep = 'nan', header = False, index = False)
+
+def write_edges(f, columns, row, col, value, sep):
+    columns = np.asarray(columns, dtype = object)
+    pd.DataFrame({'Source': columns[col], 'Target': columns[row], 'Weight': value}).to_csv(f, sep = sep, na_rep = 'NA', index = False)
+
+# returns one row per individual with label, sex, and optional meiosis and patside/matside attributes
+def get_nodes(df, anc = None, rel = None):
+    nodes = pd.concat([df[['p1', 'l1', 'g1']].set_axis(['id', 'label', 'sex'], axis = 1),
+                       df[['p2', 'l2', 'g2']].set_axis(['id', 'label', 'sex'], axis = 1)])
+    nodes = nodes.drop_duplicates('id').reset_index(drop = True)
+    if anc:
+        dfa = read_table(anc).drop_duplicates('testGuid').set_index('testGuid')
+        nodes['meiosis'] = nodes['id'].map(dfa['meiosisValue']).astype('Int64')
+        for key in ['patside', 'matside']:
+            if key in dfa:
+                nodes[key] = nodes['id'].map(dfa[key]).astype('boolean')
+    if rel:
+        dfr = read_table(rel).drop_duplicates('human_id').set_index('human_id')
+        if 'rel_alg' in dfr:
+            nodes['meiosis'] = nodes['id'].map(dfr['rel_alg'].map(rel_alg)).astype('Int64')
+        for key in ['patside', 'matside']:
+            if key in dfr:
+                nodes[key] = nodes['id'].map(dfr[key]).astype('boolean')
+    return nodes
+
+# formats a column of values as escaped XML text with missing values left as NaN
+def xml_text(values, key):
+    values = pd.Series(values)
+    if xml_types.get(key) == 'boolean':
+        return values.map({True: 'true', False: 'false'})
+    text = values.astype(str).str.replace('&', '&amp;').str.replace('<', '&lt;').str.replace('>', '&gt;').str.replace('"', '&quot;')
+    return text.where(values.notna())
+
+# writes one XML element per row in chunks so that the whole document is never held in memory
+def write_elements(f, table, fmt, chunksize = 100000):
+    for start in range(0, len(table), chunksize):
+        chunk = table.iloc[start:start + chunksize]
+        f.write(''.join(fmt(chunk.reset_index(drop = True), start)))
+
+def write_gexf(f, nodes, edges):
+    node_keys = [key for key in nodes.columns if key not in ['id', 'label']]
+    edge_keys = [key for key in edges.columns if key not in ['source', 'target', 'weight']]
+    f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    f.write('<gexf xmlns="http://www.gexf.net/1.2draft" version="1.2">\n')
+    f.write('  <graph mode="static" defaultedgetype="undirected">\n')
+    for cls, keys in ('node', node_keys), ('edge', edge_keys):
+        f.write('    <attributes class="' + cls + '">\n')
+        for key in keys:
+            f.write('      <attribute id="' + key + '" title="' + key + '" type="' + xml_types[key] + '"/>\n')
+        f.write('    </attributes>\n')
+    def attvalues(chunk, keys):
+        text = '<attvalues>'
+        for key in keys:
+            text += ('<attvalue for="' + key + '" value="' + xml_text(chunk[key], key) + '"/>').fillna('')
+        return text + '</attvalues>'
+    def fmt_node(chunk, start):
+        label = (' label="' + xml_text(chunk['label'], 'label') + '"').fillna('')
+        return '      <node id="' + xml_text(chunk['id'], 'id') + '"' + label + '>' + attvalues(chunk, node_keys) + '</node>\n'
+    def fmt_edge(chunk, start):
+        weight = (' weight="' + xml_text(chunk['weight'], 'weight') + '"').fillna('') if 'weight' in chunk else ''
+        return '      <edge id="' + pd.Series(np.arange(start, start + len(chunk))).astype(str) + '" source="' + xml_text(chunk['source'], 'source') + '" target="' + xml_text(chunk['target'], 'target') + '"' + weight + '>' + attvalues(chunk, edge_keys) + '</edge>\n'
+    f.write('    <nodes>\n')
+    write_elements(f, nodes, fmt_node)
+    f.write('    </nodes>\n')
+    f.write('    <edges>\n')
+    write_elements(f, edges, fmt_edge)
+    f.write('    </edges>\n')
+    f.write('  </graph>\n')
+    f.write('</gexf>\n')
+
+def write_graphml(f, nodes, edges):
+    node_keys = [key for key in nodes.columns if key != 'id']
+    edge_keys = [key for key in edges.columns if key not in ['source', 'target']]
+    f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    f.write('<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+    for cls, keys in ('node', node_keys), ('edge', edge_keys):
+        for key in keys:
+            f.write('  <key id="' + cls[0] + '_' + key + '" for="' + cls + '" attr.name="' + key + '" attr.type="' + xml_types[key] + '"/>\n')
+    f.write('  <graph edgedefault="undirected">\n')
+    def data(chunk, cls, keys):
+        text = ''
+        for key in keys:
+            text += ('<data key="' + cls + '_' + key + '">' + xml_text(chunk[key], key) + '</data>').fillna('')
+        return text
+    def fmt_node(chunk, start):
+        return '    <node id="' + xml_text(chunk['id'], 'id') + '">' + data(chunk, 'n', node_keys) + '</node>\n'
+    def fmt_edge(chunk, start):
+        return '    <edge source="' + xml_text(chunk['source'], 'source') + '" target="' + xml_text(chunk['target'], 'target') + '">' + data(chunk, 'e', edge_keys) + '</edge>\n'
+    write_elements(f, nodes, fmt_node)
+    write_elements(f, edges, fmt_edge)
+    f.write('  </graph>\n')
+    f.write('</graphml>\n')
+
+def get_parser():
+    parser = argparse.ArgumentParser(description = 'Convert AncestryDNA/23andMe matches graph to matrix (16 Aug 2018)', add_help = False, usage = 'graph2matrix.py [options]')
+    parser.add_argument('-t', metavar = '<CHAR>', type = str, default = 'tab', help = 'separator [tab]')
+    parser.add_argument('-f', metavar = '<STR>', type = str, default = 'dense', choices = ['dense', 'mtx', 'edges', 'gexf', 'graphml', 'parquet'], help = 'output format: dense, mtx (Matrix Market), edges (Source/Target/Weight list), gexf, graphml, or parquet (edge list) [dense]')
+    parser.add_argument('-l', action = 'store_true', default = False, help = 'whether to use labels rather than ids [False]')
+    parser.add_argument('-v', action = 'store_true', default = False, help = 'whether to remove HapMap/Mendel/Fisher 23andMe individuals [False]')
+    parser.add_argument('-c', action = 'store_true', default = False, help = 'whether to convert special characters to _ [False]')
+    parser.add_argument('-g', action = 'store_true', default = False, help = 'whether to use genetic distance rather than physical distance [False]')
+    parser.add_argument('-h', metavar = '<FILE>', type = str, help = '23andMe inheritance table file')
+    parser.add_argument('-anc', metavar = '<FILE>', type = str, help = 'AncestryDNA matches file with node attributes for gexf/graphml output')
+    parser.add_argument('-rel', metavar = '<FILE>', type = str, help = '23andMe matches file with node attributes for gexf/graphml output')
+    try:
+        parser.add_argument('-i', metavar = '<FILE>', type = argparse.FileType('r', encoding = 'UTF-8'), default = sys.stdin, help = 'input graph file [stdout]')
+        parser.add_argument('-o', metavar = '<FILE>', type = argparse.FileType('w', encoding = 'UTF-8'), default = sys.stdout, help = 'output matrix file [stdout]')
+    except TypeError:
+        sys.stderr.write('Python >= 3.4 is required to run this script\n')
+        sys.stderr.write('(see https://docs.python.org/3/whatsnew/3.4.html#argparse)\n')
+        exit(2)
+    add_argument(parser)
+    return parser
+
+def main(argv = None):
+    parser = get_parser()
+
+    # extract arguments from the command line
+    try:
+        parser.error = parser.exit
+        args = parser.parse_args(argv)
+    except SystemExit:
+        parser.print_help()
+        exit(2)
+
+    profiler.start('graph2matrix', args.profile, get_prefix(args.o, 'graph2matrix'))
+
+    profiler.mark('read')
+    df = read_table(args.i)
+    profiler.mark('table')
+    # graph files from ancestry2graph.py use different column names
+    df = df.rename(columns = {'human_id_1': 'p1', 'name_1': 'l1', 'sex_1': 'g1', 'human_id_2': 'p2', 'name_2': 'l2', 'sex_2': 'g2'})
+    if args.v:
+        idx = ~df['p1'].str.startswith('v$') & ~df['p2'].str.startswith('v$')
+        df = df.loc[idx]
+    if args.c:
+        df['l1'] = df['l1'].str.replace('[ .]', '_', regex = True)
+        df['l2'] = df['l2'].str.replace('[ .]', '_', regex = True)
+    shared = ('cm' if args.g else 'mb') if 'mb' in df or 'cm' in df else None
+    sep = '\t' if args.t == 'tab' else args.t
+
+    if args.f in ['dense', 'mtx', 'edges']:
+        if args.h:
+            dfh = read_table(args.h)
+            if args.c:
+                dfh['people_labels'] = dfh['people_labels'].str.replace('[ .]', '_', regex = True)
+            columns = dfh['people_labels'] if args.l else dfh['people_ids']
+        else:
+            columns = pd.concat([df['l1'], df['l2']]) if args.l else pd.concat([df['p1'], df['p2']])
+        columns = pd.unique(columns.dropna()).tolist()
+        row, col, value = get_coo(df, columns, 'l' if args.l else 'p', shared)
+        profiler.mark('write')
+        if args.f == 'dense':
+            write_dense(args.o, columns, row, col, value, sep)
+        elif args.f == 'mtx':
+            write_mtx(args.o, columns, row, col, value)
+        elif args.f == 'edges':
+            write_edges(args.o, columns, row, col, value, sep)
+
+    # graph formats are streamed from the edge table without building a matrix
+    else:
+        if args.h:
+            dfh = read_table(args.h)
+            df = df[df['p1'].isin(dfh['people_ids']) & df['p2'].isin(dfh['people_ids'])]
+        if args.f == 'parquet':
+            profiler.mark('write')
+            args.o.flush()
+            write_table(df, args.o, 'parquet')
+        else:
+            nodes = get_nodes(df, args.anc, args.rel)
+            edges = pd.DataFrame({'source': df['p1'].values, 'target': df['p2'].values})
+            if shared:
+                edges['weight'] = df[shared].values
+            for key in ['mb', 'cm', 'seg_cm', 'segments', 'meiosis', 'relationship', 'rel_prob', 'relationship_2', 'rel_prob_2', 'relationship_3', 'rel_prob_3']:
+                if key in df:
+                    edges[key] = df[key].astype('Int64').values if xml_types[key] == 'int' else df[key].values
+            profiler.mark('write')
+            if args.f == 'gexf':
+                write_gexf(args.o, nodes, edges)
+            elif args.f == 'graphml':
+                write_graphml(args.o, nodes, edges)
+
+    profiler.stop()
+
+if __name__ == '__main__':
+    main()
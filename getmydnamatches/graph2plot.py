@@ -0,0 +1,280 @@
+"""
+   graph2plot.py - Generate visualization from graph file
+   Copyright (C) 2015-2018 Giulio Genovese (giulio.genovese@gmail.com)
+
+   This program is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+   Written by Giulio Genovese <giulio.genovese@gmail.com>
+"""
+
+import sys, argparse, re
+from .lazy import lazy_import
+from .graphlayout import cached_layout
+from .relationships import rel_alg
+from .dnaio import read_table, write_table
+from .profiler import profiler, add_argument, get_prefix
+from .dnagraph import get_adjacency, propagate_side, ego_edges, topk_edges, kcore_edges, component_edges
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+matplotlib = lazy_import('matplotlib')
+plt = lazy_import('matplotlib.pyplot')
+backend_pdf = lazy_import('matplotlib.backends.backend_pdf')
+nx = lazy_import('networkx')
+
+# above this number of nodes and edges, nodes and edges are rasterized in the pdf output
+raster_size = 2000
+
+def get_parser():
+    parser = argparse.ArgumentParser(description = 'Generate visualization from graph file (16 Aug 2018)', add_help = False, usage = 'graph2plot.py [options]')
+    parser.add_argument('-t', metavar = '<CHAR>', type = str, default = 'tab', help = 'separator [tab]')
+    parser.add_argument('-n', action = 'store_true', default = False, help = 'whether to omit node names [False]')
+    parser.add_argument('-l', action = 'store_true', default = False, help = 'whether to use ids rather than labels [False]')
+    #parser.add_argument('-v', action = 'store_true', default = False, help = 'whether to remove HapMap/Mendel/Fisher 23andMe individuals [False]')
+    parser.add_argument('-c', action = 'store_true', default = False, help = 'whether to convert special characters to _ [False]')
+    parser.add_argument('-r', metavar = '<IID>', nargs = '+', type = str, help = 'list of individuals to remove')
+    parser.add_argument('-R', metavar = '<FILE>', type = str, help = 'file with individuals to remove')
+    parser.add_argument('-cm', metavar = '<FLOAT>', type = float, help = 'minimum number of centiMorgans')
+    parser.add_argument('-maxm', metavar = '<INT>', type = int, help = 'maximum estimated number of meioses of the edges to plot')
+    parser.add_argument('-e', metavar = '<IID>', nargs = '+', type = str, help = 'list of individuals whose neighborhoods to plot')
+    parser.add_argument('-er', metavar = '<INT>', type = int, default = 1, help = 'radius of the neighborhoods to plot [1]')
+    parser.add_argument('-top', metavar = '<INT>', type = int, help = 'number of strongest edges to keep for each individual')
+    parser.add_argument('-k', metavar = '<INT>', type = int, help = 'minimum number of neighbors in the k-core to plot')
+    parser.add_argument('-minc', metavar = '<INT>', type = int, help = 'minimum number of individuals in connected components to plot')
+    parser.add_argument('-anc', metavar = '<FILE>', type = str, help = 'AncestryDNA matches file')
+    parser.add_argument('-rel', metavar = '<FILE>', type = str, help = '23andMe matches file')
+    parser.add_argument('-cl', metavar = '<FILE>', type = str, help = 'cluster table from graph2clusters.py to color nodes by')
+    parser.add_argument('-f', metavar = '<IID>', nargs = '+', type = str, help = 'list of father proxies')
+    parser.add_argument('-F', metavar = '<FILE>', type = str, help = 'matches file for the father')
+    parser.add_argument('-m', metavar = '<IID>', nargs = '+', type = str, help = 'list of mother proxies')
+    parser.add_argument('-M', metavar = '<FILE>', type = str, help = 'matches file for the mother')
+    parser.add_argument('-hops', metavar = '<INT>', type = int, default = 1, help = 'number of hops to spread the sides from the proxies [1]')
+    parser.add_argument('-st', metavar = '<FLOAT>', type = float, help = 'minimum side score to assign a side, required with more than one hop [0.0, any proxy among the shared matches]')
+    parser.add_argument('-S', metavar = '<FILE>', type = str, help = 'output table with paternal and maternal side scores')
+    parser.add_argument('-p', metavar = '<DIR>', type = str, help = 'directory where to cache node positions')
+    parser.add_argument('-g', action = 'store_true', default = False, help = 'whether to use the Graphviz layout through pydot [False]')
+    parser.add_argument('-s', metavar = '<FLOAT>', nargs = 2, type = float, default = [8.0, 6.0], help = 'size in inches [8.0 6.0]')
+    parser.add_argument('-o', metavar = '<FILE>', type = str, help = 'output pdf file')
+    try:
+        parser.add_argument('-i', metavar = '[FILE]', type = argparse.FileType('r', encoding = 'UTF-8'), default = sys.stdin, help = 'sharing table [stdin]')
+        # parser.add_argument('-i', metavar = '<FILE>', default = sys.stdin, help = 'input graph file [stdin]')
+    except TypeError:
+        sys.stderr.write('Python >= 3.4 is required to run this script\n')
+        sys.stderr.write('(see https://docs.python.org/3/whatsnew/3.4.html#argparse)\n')
+        exit(2)
+    add_argument(parser)
+    return parser
+
+def main(argv = None):
+    parser = get_parser()
+
+    # extract arguments from the command line
+    try:
+        parser.error = parser.exit
+        args = parser.parse_args(argv)
+        # scores fade with each hop at a rate that depends on the graph, so no default suits more than one hop
+        if args.hops > 1 and args.st is None:
+            sys.stderr.write('Error: a minimum side score (-st) is required with more than one hop\n')
+            parser.exit()
+    except SystemExit:
+        parser.print_help()
+        exit(2)
+
+    profiler.start('graph2plot', args.profile, get_prefix(args.o, 'graph2plot'))
+
+    profiler.mark('read')
+    remove = set()
+    if args.r:
+        remove |= set(args.r)
+    if args.R:
+        df = read_table(args.R)
+        if 'human_id' in df:
+            remove |= set(df['human_id'])
+        elif 'testGuid' in df:
+            remove |= set(df['testGuid'])
+
+    # shapes = 'so^>v<dph8'
+
+    if args.anc:
+        df = read_table(args.anc)
+        meiosis = pd.Series(df['meiosisValue'].values, index = df['testGuid']).to_dict()
+        hint = pd.Series(df['hasHint'].values, index = df['testGuid']).to_dict()
+        patside = pd.Series(df['patside'].values, index = df['testGuid']).to_dict() if 'patside' in df else pd.Series(False, index = df['testGuid']).to_dict()
+        matside = pd.Series(df['matside'].values, index = df['testGuid']).to_dict() if 'matside' in df else pd.Series(False, index = df['testGuid']).to_dict()
+        if args.F:
+            df = read_table(args.F)
+            for guid in set(df['testGuid']).intersection(patside):
+                patside[guid] = True
+        if args.M:
+            df = read_table(args.M)
+            for guid in set(df['testGuid']).intersection(matside):
+                matside[guid] = True
+
+    if args.rel:
+        df = read_table(args.rel)
+        # gender = pd.Series(df['sex'].apply(str.lower).values, index = df['human_id']).to_dict()
+        meiosis = pd.Series(df['rel_alg'].apply(lambda x: rel_alg[x]).values, index = df['human_id']).to_dict()
+        hint = pd.Series(False, index = df['human_id']).to_dict()
+        patside = pd.Series(df['patside'].values, index = df['human_id']).to_dict()
+        matside = pd.Series(df['matside'].values, index = df['human_id']).to_dict()
+        if args.F:
+            df = read_table(args.F)
+            for ehid in set(df['human_id']).intersection(patside):
+                patside[ehid] = True
+        if args.M:
+            df = read_table(args.M)
+            for ehid in set(df['human_id']).intersection(matside):
+                matside[ehid] = True
+
+    df = read_table(args.i, sep = '\t' if args.t == 'tab' else args.t)
+    # graph files from ibdview2graph.py use different column names
+    df = df.rename(columns = {'p1': 'human_id_1', 'l1': 'name_1', 'g1': 'sex_1', 'p2': 'human_id_2', 'l2': 'name_2', 'g2': 'sex_2', 'cm': 'seg_cm'})
+    p1 = 'human_id_1' if args.l else 'name_1'
+    p2 = 'human_id_2' if args.l else 'name_2'
+    #if args.v:
+    #    idx = df['p1'].apply(lambda x: x[0:2]!='v$') & df['p2'].apply(lambda x: x[0:2]!='v$')
+    #    df = df.loc[idx]
+    if args.c:
+        df['name_1'] = df['name_1'].apply(lambda x: re.sub('[ .]','_',x))
+        df['name_2'] = df['name_2'].apply(lambda x: re.sub('[ .]','_',x))
+
+    # select the edges between the individuals to keep
+    idx = ~df['human_id_1'].isin(remove) & ~df['human_id_2'].isin(remove)
+    if args.rel:
+        idx &= df['human_id_1'].isin(list(meiosis)) & df['human_id_2'].isin(list(meiosis))
+
+    # spread the paternal and maternal sides from the proxies through the graph without the owners of the kits,
+    # which share with all their matches and would otherwise pass both sides to everyone within two hops
+    profiler.mark('sides')
+    if args.anc or args.rel:
+        owners = [iid for iid, value in meiosis.items() if value == 0]
+        ids, adj = get_adjacency(df[idx & ~df['human_id_1'].isin(owners) & ~df['human_id_2'].isin(owners)])
+        scores = pd.DataFrame(index = ids)
+        threshold = args.st if args.st is not None else 0.0
+        for key, side, proxies in ('patscore', patside, args.f), ('matscore', matside, args.m):
+            scores[key] = propagate_side(adj, ids.isin(proxies), args.hops) if proxies else 0.0
+            if proxies:
+                side.update(dict.fromkeys(ids[(scores[key].values > threshold) & ids.isin(list(side))], True))
+                side.update(dict.fromkeys([iid for iid in proxies if iid in side], True))
+        if args.S:
+            write_table(scores.rename_axis('human_id'), args.S, index = True)
+
+    # without matches tables, nodes are sized by the relationship estimated with the removed individuals, such as the
+    # owners of the kits, as relationships between matches say little about their relationships with the kits
+    profiler.mark('table')
+    if not (args.anc or args.rel) and 'meiosis' in df and args.r:
+        idx1, idx2 = df['human_id_1'].isin(args.r), df['human_id_2'].isin(args.r)
+        closest = pd.concat([pd.Series(df.loc[idx1, 'meiosis'].values, index = df.loc[idx1, 'human_id_2'].values),
+                             pd.Series(df.loc[idx2, 'meiosis'].values, index = df.loc[idx2, 'human_id_1'].values)]).groupby(level = 0).min()
+
+    # select the edges to plot before computing the layout
+    if args.cm and 'seg_cm' in df:
+        idx &= df['seg_cm'].isnull() | (df['seg_cm'] > args.cm)
+    if args.maxm and 'meiosis' in df:
+        idx &= df['meiosis'].isnull() | (df['meiosis'] <= args.maxm)
+    df = df[idx]
+    if args.e:
+        df = df[ego_edges(df, args.e, args.er)]
+    if args.top:
+        df = df[topk_edges(df, args.top)]
+    if args.k:
+        df = df[kcore_edges(df, args.k)]
+    if args.minc:
+        df = df[component_edges(df, args.minc)]
+
+    # nodes are added in order of appearance with the attributes of their last appearance
+    nodes = pd.DataFrame({'node': np.column_stack([df[p1], df[p2]]).ravel(),
+                          'human_id': np.column_stack([df['human_id_1'], df['human_id_2']]).ravel(),
+                          'gender': np.column_stack([df['sex_1'], df['sex_2']]).ravel()})
+    nodes = nodes.drop_duplicates('node', keep = 'last').set_index('node').reindex(pd.unique(nodes['node']))
+    nodes['gender'] = nodes['gender'].str.lower()
+    if args.anc or args.rel:
+        for key, value in ('meiosis', meiosis), ('hint', hint), ('patside', patside), ('matside', matside):
+            nodes[key] = [value[iid] for iid in nodes['human_id']]
+    elif 'meiosis' in df and args.r:
+        nodes['meiosis'] = nodes['human_id'].map(closest).values
+    G = nx.Graph()
+    G.add_nodes_from(zip(nodes.index, nodes.to_dict('records')))
+    G.add_edges_from(zip(df[p1], df[p2]))
+
+    if args.o:
+        pp = backend_pdf.PdfPages(args.o)
+        plt.figure(figsize = (args.s[0], args.s[1]))
+    profiler.mark('layout')
+    if args.g:
+        pos = nx.nx_pydot.pydot_layout(G) # python3-pydotplus needs to be installed
+    else:
+        nodes = list(G.nodes)
+        index = {node: i for i, node in enumerate(nodes)}
+        edges = np.array([(index[a], index[b]) for a, b in G.edges], dtype = np.int64).reshape(-1, 2)
+        pos = dict(zip(nodes, cached_layout(nodes, edges[:, 0], edges[:, 1], cachedir = args.p)))
+
+    profiler.mark('render')
+    colors = {(False, False, False): 'white',      (False, False, True): 'gray',
+              (False, True,  False): 'pink',       (False, True,  True): 'deeppink',
+              (True,  False, False): 'lightblue',  (True,  False, True): 'blue',
+              (True,  True,  False): 'lightgreen', (True,  True,  True): 'green'}
+
+    shapes = {'male': 's', 'female': 'o', 'unknown': 'd'}
+
+    # collect the attributes of all nodes in one pass
+    nodes = pd.DataFrame([value for key, value in G.nodes(data = True)], index = pd.Index(list(G.nodes), dtype = object))
+    sizes = np.array([2048, 1536, 1024, 768, 512, 384, 256, 192, 128, 32, 32])
+    if args.anc or args.rel:
+        nodes['color'] = [colors[key] for key in zip(nodes['patside'], nodes['matside'], nodes['hint'])]
+        nodes['size'] = sizes[nodes['meiosis'].values.astype(int) - 1]
+        alpha = 1
+    elif 'meiosis' in nodes:
+        nodes['color'] = 'white'
+        meiosis = nodes['meiosis'].values.astype(float)
+        nodes['size'] = np.where(np.isnan(meiosis), 100, sizes[np.clip(np.nan_to_num(meiosis, nan = 1), 1, len(sizes)).astype(int) - 1])
+        alpha = .5
+    else:
+        nodes['color'] = 'white'
+        nodes['size'] = 100
+        alpha = .5
+
+    # color the nodes by cluster rather than by side
+    if args.cl:
+        dfc = read_table(args.cl)
+        cluster = nodes['human_id'].map(pd.Series(dfc['cluster'].values, index = dfc['human_id']))
+        palette = np.array([matplotlib.colors.to_hex(color) for color in plt.get_cmap('tab20').colors])
+        nodes['color'] = np.where(cluster.isnull(), 'white', palette[cluster.fillna(0).astype(int) % len(palette)])
+
+    # draw a single collection for each shape with larger nodes below smaller nodes
+    rasterized = bool(args.o) and len(G) + G.number_of_edges() > raster_size
+    for gender, group in nodes.groupby('gender', sort = False) if len(nodes) > 0 else []:
+        if not gender in shapes:
+            continue
+        group = group.sort_values('size', ascending = False, kind = 'stable')
+        collection = nx.draw_networkx_nodes(G, pos, nodelist = group.index.tolist(), node_color = group['color'].tolist(), node_shape = shapes[gender], node_size = group['size'].values, alpha = alpha)
+        collection.set_rasterized(rasterized)
+    if G.number_of_edges() > 0:
+        collection = nx.draw_networkx_edges(G, pos, edge_color = 'gray', alpha = .25)
+        collection.set_rasterized(rasterized)
+    if not args.n:
+        nx.draw_networkx_labels(G, pos, font_size = 8)
+
+    plt.axis('off')
+    profiler.mark('write')
+    if args.o:
+        pp.savefig(dpi = 300)
+        pp.close()
+    else:
+        plt.show()
+
+    profiler.stop()
+
+if __name__ == '__main__':
+    main()
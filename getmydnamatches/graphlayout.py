@@ -0,0 +1,182 @@
+"""
+   graphlayout.py - Force-directed layout of matches graphs
+   Copyright (C) 2015-2018 Giulio Genovese (giulio.genovese@gmail.com)
+
+   This program is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+   Written by Giulio Genovese <giulio.genovese@gmail.com>
+"""
+
+import os, glob, hashlib
+from .lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# below this number of nodes repulsive forces are computed between all pairs of nodes
+exact_nodes = 1000
+
+# fraction of the nodes that must already be in a cached layout for it to be updated rather than recomputed
+reuse_fraction = .8
+
+# returns repulsive displacements between the selected nodes and all other nodes in blocks of rows
+def exact_repulsion(pos, rows = None, chunksize = 1000):
+    rows = np.arange(len(pos)) if rows is None else rows
+    disp = np.zeros_like(pos)
+    for start in range(0, len(rows), chunksize):
+        idx = rows[start:start + chunksize]
+        delta = pos[idx, None, :] - pos[None, :, :]
+        dist2 = (delta ** 2).sum(axis = 2)
+        # nodes do not repel themselves
+        dist2[np.arange(len(idx)), idx] = np.inf
+        disp[idx] = (delta / np.maximum(dist2, 1e-4)[:, :, None]).sum(axis = 1)
+    return disp
+
+# returns approximate repulsive displacements using a hierarchy of grids in the spirit of Barnes-Hut
+# at each level nodes are repelled by the center of mass of the cells that are not adjacent to their own cell
+# but whose parent cells are adjacent, while nodes in adjacent cells at the finest level repel exactly
+def tree_repulsion(pos):
+    n = len(pos)
+    levels = max(int(np.ceil(np.log(n) / np.log(4))), 2)
+    # cells are defined on the ranks of the coordinates so that each cell at the finest level holds about one node
+    rank = np.argsort(np.argsort(pos, axis = 0, kind = 'stable'), axis = 0, kind = 'stable')
+    # offsets from a cell to the children of the cells adjacent to its parent that are not adjacent to the cell itself
+    # for each of the four positions the cell can have within its parent
+    offsets = np.array([[(dx - px, dy - py) for dx in range(-2, 4) for dy in range(-2, 4) if abs(dx - px) > 1 or abs(dy - py) > 1] for px in (0, 1) for py in (0, 1)])
+    disp = np.zeros_like(pos)
+    for level in range(2, levels + 1):
+        size = 2 ** level
+        cxy = rank * size // n
+        cell = cxy[:, 0] * size + cxy[:, 1]
+        mass = np.bincount(cell, minlength = size * size).astype(float)
+        center = [np.bincount(cell, weights = pos[:, axis], minlength = size * size) / np.maximum(mass, 1) for axis in (0, 1)]
+        parity = (cxy[:, 0] % 2) * 2 + cxy[:, 1] % 2
+        nx = cxy[:, 0, None] + offsets[parity, :, 0]
+        ny = cxy[:, 1, None] + offsets[parity, :, 1]
+        valid = (nx >= 0) & (nx < size) & (ny >= 0) & (ny < size)
+        nb = np.where(valid, nx * size + ny, 0)
+        dx = pos[:, 0, None] - center[0][nb]
+        dy = pos[:, 1, None] - center[1][nb]
+        weight = np.where(valid, mass[nb], 0) / np.maximum(dx * dx + dy * dy, 1e-4)
+        disp[:, 0] += (dx * weight).sum(axis = 1)
+        disp[:, 1] += (dy * weight).sum(axis = 1)
+
+    # exact repulsion between nodes in the same or adjacent cells at the finest level
+    order = np.argsort(cell, kind = 'stable')
+    first = np.cumsum(mass).astype(np.int64) - mass.astype(np.int64)
+    for dx in -1, 0, 1:
+        for dy in -1, 0, 1:
+            nx, ny = cxy[:, 0] + dx, cxy[:, 1] + dy
+            valid = (nx >= 0) & (nx < size) & (ny >= 0) & (ny < size)
+            nb = np.where(valid, nx * size + ny, 0)
+            k = np.where(valid, mass[nb], 0).astype(np.int64)
+            src = np.repeat(np.arange(n), k)
+            offset = np.arange(len(src)) - np.repeat(np.cumsum(k) - k, k)
+            tgt = order[np.repeat(first[nb], k) + offset]
+            idx = src != tgt
+            src, tgt = src[idx], tgt[idx]
+            delta = pos[src] - pos[tgt]
+            dist2 = np.maximum((delta ** 2).sum(axis = 1), 1e-4)
+            for axis in 0, 1:
+                disp[:, axis] += np.bincount(src, weights = delta[:, axis] / dist2, minlength = n)
+    return disp
+
+# computes positions for n nodes connected by edges (i, j) with optional weights w
+# nodes flagged as fixed keep their initial positions
+def force_layout(n, i, j, w = None, pos = None, fixed = None, iterations = 50, temperature = None, seed = 0):
+    rng = np.random.default_rng(seed)
+    side = np.sqrt(max(n, 1))
+    if pos is None:
+        pos = rng.random((n, 2)) * side
+    else:
+        pos = np.array(pos, dtype = float)
+        missing = np.isnan(pos).any(axis = 1)
+        pos[missing] = rng.random((missing.sum(), 2)) * side
+    if n < 2:
+        return pos
+    w = np.ones(len(i)) if w is None else np.where(np.isnan(w), np.nanmean(w) if np.any(~np.isnan(w)) else 1.0, w)
+    w = w / w.mean() if len(w) > 0 and w.mean() > 0 else w
+    movable = np.ones(n, dtype = bool) if fixed is None else ~np.asarray(fixed)
+    rows = np.flatnonzero(movable)
+    # when few nodes move only their repulsion needs to be computed
+    local = len(rows) * n <= exact_nodes ** 2
+    t0 = side / 10 if temperature is None else temperature
+    for it in range(iterations):
+        disp = exact_repulsion(pos, rows) if local else tree_repulsion(pos)
+        # attractive forces are proportional to the squared edge length
+        delta = pos[i] - pos[j]
+        dist = np.sqrt((delta ** 2).sum(axis = 1))
+        force = delta * (dist * w)[:, None]
+        for axis in 0, 1:
+            disp[:, axis] += np.bincount(j, weights = force[:, axis], minlength = n) - np.bincount(i, weights = force[:, axis], minlength = n)
+        # weak gravity keeps disconnected components together
+        disp += (pos.mean(axis = 0) - pos) * 0.1
+        length = np.maximum(np.sqrt((disp ** 2).sum(axis = 1)), 1e-9)
+        t = t0 * (1 - it / iterations)
+        pos[movable] += (disp * (np.minimum(length, t) / length)[:, None])[movable]
+    return pos
+
+# returns a key that identifies the graph from its set of undirected edges
+def graph_key(nodes, i, j):
+    nodes = np.asarray(nodes, dtype = str)
+    a, b = nodes[i], nodes[j]
+    pairs = pd.DataFrame({'a': np.where(a < b, a, b), 'b': np.where(a < b, b, a)}).drop_duplicates().sort_values(['a', 'b'])
+    isolated = np.setdiff1d(nodes, np.concatenate([a, b]))
+    text = '\n'.join(pairs['a'] + '\t' + pairs['b']) + '\n' + '\n'.join(np.sort(isolated))
+    return hashlib.sha1(text.encode('UTF-8')).hexdigest()
+
+# returns the cached layout sharing the most nodes with the graph and the number of shared nodes
+def closest_layout(nodes, files):
+    best, overlap = None, 0
+    for f in files:
+        shared = np.isin(nodes, pd.read_csv(f, sep = '\t', dtype = {'node': str}, usecols = ['node'])['node'].values).sum()
+        if shared > overlap:
+            best, overlap = f, shared
+    return best, overlap
+
+# returns positions for the nodes reusing the position cache directory when possible
+# if the graph is not in the cache but most of its nodes are in a cached layout, that layout is used
+# as a starting point and only new nodes and their neighbors are moved
+def cached_layout(nodes, i, j, w = None, cachedir = None, iterations = 50):
+    if not cachedir:
+        return force_layout(len(nodes), i, j, w, iterations = iterations)
+    key = graph_key(nodes, i, j)
+    path = os.path.join(cachedir, key + '.tsv')
+    if os.path.exists(path):
+        df = pd.read_csv(path, sep = '\t', dtype = {'node': str}).set_index('node')
+        return df.loc[np.asarray(nodes, dtype = str), ['x', 'y']].values
+
+    best, overlap = closest_layout(np.asarray(nodes, dtype = str), glob.glob(os.path.join(cachedir, '*.tsv')))
+    if best and overlap >= reuse_fraction * len(nodes):
+        df = pd.read_csv(best, sep = '\t', dtype = {'node': str}).set_index('node')
+        pos = df.reindex(np.asarray(nodes, dtype = str))[['x', 'y']].values
+        new = np.isnan(pos).any(axis = 1)
+        # place new nodes next to the mean position of their already placed neighbors
+        count = np.bincount(i, weights = ~new[j], minlength = len(nodes)) + np.bincount(j, weights = ~new[i], minlength = len(nodes))
+        total = np.zeros_like(pos)
+        for axis in 0, 1:
+            total[:, axis] = np.bincount(i, weights = np.where(new[j], 0, pos[j, axis]), minlength = len(nodes)) + np.bincount(j, weights = np.where(new[i], 0, pos[i, axis]), minlength = len(nodes))
+        idx = new & (count > 0)
+        pos[idx] = total[idx] / count[idx, None] + np.random.default_rng(0).normal(scale = .1, size = (idx.sum(), 2))
+        moving = new.copy()
+        moving[i[new[j]]] = True
+        moving[j[new[i]]] = True
+        # moving nodes can travel as far as in a full layout of a graph of their size
+        pos = force_layout(len(nodes), i, j, w, pos = pos, fixed = ~moving, iterations = iterations, temperature = max(np.sqrt(moving.sum()) / 10, 1.0))
+    else:
+        pos = force_layout(len(nodes), i, j, w, iterations = iterations)
+
+    os.makedirs(cachedir, exist_ok = True)
+    pd.DataFrame({'node': nodes, 'x': pos[:, 0], 'y': pos[:, 1]}).to_csv(path, sep = '\t', index = False)
+    return pos
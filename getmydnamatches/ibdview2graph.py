@@ -0,0 +1,107 @@
+"""
+   ibd2graph.py - Process 23andMe IBD sharing data dump
+   Copyright (C) 2015-2018 Giulio Genovese (giulio.genovese@gmail.com)
+
+   This program is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+   Written by Giulio Genovese <giulio.genovese@gmail.com>
+"""
+
+import sys, argparse, json
+from .lazy import lazy_import
+from .dnaio import read_table, write_table
+from .relationships import add_relationships
+from .profiler import profiler, add_argument, get_prefix
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+def load_genetic_map(chroms, files):
+    gmap = dict()
+    for chrom, file in zip(chroms, files):
+        df = pd.read_csv(file, sep = r'\s+', names = ['CHR', 'ID' ,'CM', 'BP'])
+        gmap[chrom] = df[['BP', 'CM']]
+    return gmap
+
+def get_mb(intervals, flag):
+    correction = sum([np.diff(seg)[0] for seg in intervals['X'][0]]) / 2e6 if flag else 0
+    return sum([np.diff(seg)[0] for (key, value) in intervals.items() for seg in value[0]]) / 1e6 - correction
+
+# wget http://bochet.gcc.biostat.washington.edu/beagle/genetic_maps/plink.GRCh37.map.zip
+def get_cm(intervals, gmap, flag):
+    correction = sum([np.diff(np.interp(seg, gmap['X']['BP'], gmap['X']['CM']))[0] for seg in intervals['X'][0]]) / 2 if flag else 0
+    return sum([np.diff(np.interp(seg, gmap[key]['BP'], gmap[key]['CM']))[0] for (key, value) in intervals.items() for seg in value[0]]) - correction
+
+# returns the graph of the pairs of individuals in the inheritance table from the ibdview table
+def get_graph(inheritance, ibdview, gmap = None):
+    ehid_label = dict(zip(inheritance['people_ids'], inheritance['people_labels']))
+    ehid_gender = dict(zip(inheritance['people_ids'], inheritance['gender']))
+    df = ibdview
+    idx = df['p1'].apply(lambda x: x in ehid_label) & df['p2'].apply(lambda x: x in ehid_label)
+    df = df.loc[idx].copy()
+    for i in df.index:
+        p1 = df['p1'][i]
+        p2 = df['p2'][i]
+        intervals = json.loads(df['intervals'][i])
+        df.at[i, 'l1'] = ehid_label[p1]
+        df.at[i, 'l2'] = ehid_label[p2]
+        df.at[i, 'g1'] = ehid_gender[p1]
+        df.at[i, 'g2'] = ehid_gender[p2]
+        flag = ehid_gender[p1] == 'Male' and ehid_gender[p2] == 'Male'
+        df.at[i, 'mb'] = get_mb(intervals, flag)
+        df.at[i, 'segments'] = sum([len(value[0]) for value in intervals.values()])
+        if gmap:
+            df.at[i, 'cm'] = get_cm(intervals, gmap, flag)
+    return add_relationships(df[['p1','l1','g1','p2','l2','g2','mb'] + (['cm'] if gmap else []) + ['segments']])
+
+def get_parser():
+    parser = argparse.ArgumentParser(description = 'Process 23andMe IBD sharing data dump (16 Aug 2018)', add_help = False, usage = 'ibd2graph.py -h <inheritance> -i <ibdview> [options]')
+    parser.add_argument('-h', metavar = '<FILE>', required = True, type = str, help = 'input inheritance table file')
+    parser.add_argument('-i', metavar = '<FILE>', required = True, type = str, help = 'input ibdview table file')
+    parser.add_argument('-c', metavar = '<STR>', nargs = '+', type = str, help = 'genetic map chromosomes')
+    parser.add_argument('-g', metavar = '<STR>', nargs = '+', type = str, help = 'genetic map files')
+    try:
+        parser.add_argument('-o', metavar = '<FILE>', type = argparse.FileType('w', encoding = 'UTF-8'), default = sys.stdout, help = 'output graph file [stdout]')
+    except TypeError:
+        sys.stderr.write('Python >= 3.4 is required to run this script\n')
+        sys.stderr.write('(see https://docs.python.org/3/whatsnew/3.4.html#argparse)\n')
+        exit(2)
+    add_argument(parser)
+    return parser
+
+def main(argv = None):
+    parser = get_parser()
+
+    # extract arguments from the command line
+    try:
+        parser.error = parser.exit
+        args = parser.parse_args(argv)
+    except SystemExit:
+        parser.print_help()
+        exit(2)
+
+    profiler.start('ibdview2graph', args.profile, get_prefix(args.o, 'ibdview2graph'))
+
+    profiler.mark('read')
+    gmap = load_genetic_map(args.c, args.g) if args.c and args.g else None
+    inheritance, ibdview = read_table(args.h), read_table(args.i)
+    profiler.mark('table')
+    df = get_graph(inheritance, ibdview, gmap)
+    profiler.mark('write')
+    write_table(df, args.o, na_rep = '')
+
+    profiler.stop()
+
+if __name__ == '__main__':
+    main()
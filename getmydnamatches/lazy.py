@@ -0,0 +1,46 @@
+"""
+   lazy.py - Lazy imports of the modules required by each subcommand
+   Copyright (C) 2015-2018 Giulio Genovese (giulio.genovese@gmail.com)
+
+   This program is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+   Written by Giulio Genovese <giulio.genovese@gmail.com>
+"""
+
+import sys, importlib, importlib.util
+
+# stands in for a module and imports it the first time one of its attributes is used
+class LazyModule:
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self.__dict__['_module'] = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __setattr__(self, attr, value):
+        setattr(importlib.import_module(self._name), attr, value)
+
+# returns a lazily imported module, checking right away that the module is installed
+# so that missing modules are reported before any work is done
+def lazy_import(name, package = None):
+    top = name.split('.')[0]
+    if top not in sys.modules and importlib.util.find_spec(top) is None:
+        package = package if package else top
+        sys.stderr.write('You need to install the ' + package + ' module first\n')
+        sys.stderr.write('(run this in your terminal: "python3 -m pip install ' + package + '" or "python3 -m pip install --user ' + package + '")\n')
+        exit(2)
+    return sys.modules[name] if name in sys.modules else LazyModule(name)
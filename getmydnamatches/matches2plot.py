@@ -0,0 +1,197 @@
+"""
+   matches2plot.py - Creates a plot of sharing
+   Copyright (C) 2015-2018 Giulio Genovese (giulio.genovese@gmail.com)
+
+   This program is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+   Written by Giulio Genovese <giulio.genovese@gmail.com>
+"""
+
+import sys, argparse, itertools
+from .lazy import lazy_import
+from .dnaio import read_table, write_table
+from .profiler import profiler, add_argument, get_prefix
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+matplotlib = lazy_import('matplotlib')
+plt = lazy_import('matplotlib.pyplot')
+backend_pdf = lazy_import('matplotlib.backends.backend_pdf')
+
+# id column, sharing column, unit, axis limits, and ticks for 23andMe and AncestryDNA matches tables
+kinds = {'ehid': ('pct', 'pct', .07, 2, [.1, .2, .5, 1]),
+         'testGuid': ('sharedCentimorgans', 'cM', 4.5, 100, [5, 10, 20, 50])}
+
+# returns the amount of sharing of each match with the kit and the kind of matches table
+def load_kit(file):
+    df = read_table(file)
+    for iid, (share, unit, minvalue, maxvalue, ticks) in kinds.items():
+        if iid in df and share in df:
+            values = df[[iid, share]].dropna().drop_duplicates(iid).set_index(iid)[share]
+            if not pd.api.types.is_numeric_dtype(values):
+                values = values.replace({'%': ''}, regex = True).astype(float)
+            return values, iid
+    sys.stderr.write('Error: ' + file + ' is not a 23andMe or AncestryDNA matches table\n')
+    exit(2)
+
+# returns the number of shared matches, the number of matches sharing differently, and the correlation of the
+# logarithm of sharing for all pairs of kits at once from a matrix with one row per match and one column per kit
+def compare_kits(mat, diff):
+    known = ~np.isnan(mat)
+    logs = np.where(known, np.log(np.where(known, mat, 1)), 0)
+    shared = known.T.astype(float) @ known
+    # comparisons with missing values are false so only shared matches are counted
+    far = (np.abs(mat[:, :, None] - mat[:, None, :]) > diff).sum(axis = 0)
+    n = np.maximum(shared, 1)
+    sx = (logs.T @ known) / n
+    sxx = ((logs ** 2).T @ known) / n
+    sxy = (logs.T @ logs) / n
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        corr = (sxy - sx * sx.T) / np.sqrt((sxx - sx ** 2) * (sxx - sx ** 2).T)
+    return shared.astype(int), far, corr
+
+# plots the sharing of the matches shared by two kits using a density plot for large kits
+def plot_pair(ax, x, y, kind, hexbin):
+    share, unit, minvalue, maxvalue, ticks = kinds[kind]
+    far = np.abs(x - y) > min(ticks)
+    if len(x) > hexbin:
+        ax.hexbin(x, y, xscale = 'log', yscale = 'log', extent = np.log10([minvalue, maxvalue, minvalue, maxvalue]), gridsize = 50, bins = 'log', mincnt = 1, cmap = 'Blues')
+    else:
+        ax.scatter(x[~far], y[~far], color = 'blue', marker = 'x')
+        ax.scatter(x[far], y[far], color = 'red', marker = 'x')
+    ax.set_xscale('log')
+    ax.set_yscale('log')
+    ax.set_xticks(ticks)
+    ax.get_xaxis().set_major_formatter(matplotlib.ticker.ScalarFormatter())
+    ax.set_yticks(ticks)
+    ax.get_yaxis().set_major_formatter(matplotlib.ticker.ScalarFormatter())
+    ax.set_xlim(minvalue, maxvalue)
+    ax.set_ylim(minvalue, maxvalue)
+    ax.plot([minvalue, maxvalue], [minvalue, maxvalue], '-', color = 'gray', lw = 1)
+    ax.grid()
+
+def get_parser():
+    parser = argparse.ArgumentParser(description = 'Creates a plot of sharing (16 Aug 2018)', add_help = False, usage = 'matches2plot.py -a <table1> -b <table2> [options] or matches2plot.py -i <table1> <table2> ... [options]')
+    parser.add_argument('-a', metavar = '<FILE>', type = str, help = 'table1')
+    parser.add_argument('-b', metavar = '<FILE>', type = str, help = 'table2')
+    parser.add_argument('-i', metavar = '<FILE>', nargs = '+', type = str, help = 'list of tables to compare pairwise')
+    parser.add_argument('-l', metavar = '<STR>', type = str, help = 'title')
+    parser.add_argument('-la', metavar = '<STR>', type = str, help = 'label1')
+    parser.add_argument('-lb', metavar = '<STR>', type = str, help = 'label2')
+    parser.add_argument('-li', metavar = '<STR>', nargs = '+', type = str, help = 'list of labels for the tables compared pairwise')
+    parser.add_argument('-hex', metavar = '<INT>', type = int, default = 5000, help = 'number of shared matches above which to plot densities [5000]')
+    parser.add_argument('-s', metavar = '<FILE>', type = str, help = 'output table with pairwise statistics')
+    parser.add_argument('-fs', metavar = '<INT>', type = int, default = 16, help = 'font size')
+    parser.add_argument('-o', metavar = '<FILE>', type = str, help = 'output pdf file')
+    add_argument(parser)
+    return parser
+
+def main(argv = None):
+    parser = get_parser()
+
+    # extract arguments from the command line
+    try:
+        parser.error = parser.exit
+        args = parser.parse_args(argv)
+        if not args.i and not (args.a and args.b):
+            parser.exit()
+        files = args.i if args.i else [args.a, args.b]
+        if args.li and len(args.li) != len(files):
+            sys.stderr.write('Error: ' + str(len(args.li)) + ' labels given for ' + str(len(files)) + ' tables\n')
+            parser.exit()
+    except SystemExit:
+        parser.print_help()
+        exit(2)
+
+    profiler.start('matches2plot', args.profile, get_prefix(args.o, 'matches2plot'))
+
+    labels = args.li if args.li else [args.la, args.lb] if not args.i else [None] * len(files)
+
+    # load each table once into a single matrix with one row per match and one column per kit
+    profiler.mark('read')
+    kits = [load_kit(file) for file in files]
+    if len(set(kind for values, kind in kits)) > 1:
+        sys.stderr.write('Error: cannot compare 23andMe and AncestryDNA matches tables\n')
+        exit(2)
+    kind = kits[0][1]
+    share, unit, minvalue, maxvalue, ticks = kinds[kind]
+    df = pd.concat([values for values, kind in kits], axis = 1, keys = range(len(kits)))
+    mat = df.values.astype(float)
+
+    profiler.mark('table')
+    shared, far, corr = compare_kits(mat, min(ticks))
+    if args.s:
+        pairs = [(a, b) for a, b in itertools.combinations(range(len(files)), 2)]
+        stats = pd.DataFrame({'table1': [files[a] for a, b in pairs], 'table2': [files[b] for a, b in pairs],
+                              'shared': [shared[a, b] for a, b in pairs], 'far': [far[a, b] for a, b in pairs],
+                              'corr': [corr[a, b] for a, b in pairs]})
+        write_table(stats, args.s)
+
+    # pages are rendered as they are saved
+    profiler.mark('render')
+    matplotlib.rcParams.update({'font.size': args.fs})
+    if args.o:
+        pp = backend_pdf.PdfPages(args.o)
+
+    # scatter matrix with all pairs of kits on the first page
+    if len(files) > 2:
+        fig, axes = plt.subplots(len(files), len(files), figsize = (3 * len(files), 3 * len(files)), squeeze = False)
+        for a, b in itertools.product(range(len(files)), repeat = 2):
+            ax = axes[a, b]
+            if a > b:
+                idx = ~np.isnan(mat[:, a]) & ~np.isnan(mat[:, b])
+                plot_pair(ax, mat[idx, b], mat[idx, a], kind, args.hex)
+                ax.text(.05, .95, 'n=' + str(shared[a, b]) + ', r=' + '%.2f' % corr[a, b], transform = ax.transAxes, va = 'top', fontsize = 'x-small')
+            elif a == b:
+                idx = ~np.isnan(mat[:, a])
+                ax.hist(mat[idx, a], bins = np.logspace(np.log10(minvalue), np.log10(maxvalue), 30), color = 'gray')
+                ax.set_xscale('log')
+            else:
+                ax.axis('off')
+            if b == 0:
+                ax.set_ylabel(labels[a] if labels[a] else 'table' + str(a + 1), fontsize = 'small')
+            if a == len(files) - 1:
+                ax.set_xlabel(labels[b] if labels[b] else 'table' + str(b + 1), fontsize = 'small')
+        if args.l:
+            fig.suptitle(args.l)
+        if args.o:
+            pp.savefig(fig)
+            plt.close(fig)
+
+    # one page for each pair of kits
+    for a, b in itertools.combinations(range(len(files)), 2):
+        idx = ~np.isnan(mat[:, a]) & ~np.isnan(mat[:, b])
+        fig, ax = plt.subplots()
+        plot_pair(ax, mat[idx, a], mat[idx, b], kind, args.hex)
+        if args.l:
+            ax.set_title(args.l)
+        if labels[a]:
+            ax.set_xlabel('shared with ' + labels[a] + ' (' + unit + ')')
+        if labels[b]:
+            ax.set_ylabel('shared with ' + labels[b] + ' (' + unit + ')')
+        fig.subplots_adjust(bottom = 0.15)
+        if args.o:
+            pp.savefig(fig)
+            plt.close(fig)
+
+    profiler.mark('write')
+    if args.o:
+        pp.close()
+    else:
+        plt.show()
+
+    profiler.stop()
+
+if __name__ == '__main__':
+    main()
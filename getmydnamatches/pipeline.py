@@ -0,0 +1,177 @@
+"""
+   pipeline.py - Run a pipeline of subcommands caching the output of each stage
+   Copyright (C) 2015-2018 Giulio Genovese (giulio.genovese@gmail.com)
+
+   This program is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+   Written by Giulio Genovese <giulio.genovese@gmail.com>
+"""
+
+import os, sys, glob, argparse, json, time, hashlib, shutil, importlib, concurrent.futures
+from . import commands
+
+# reference to the output of the stage itself, other stages are referenced by their names preceded by @
+out_ref = '@out'
+
+def log(text):
+    sys.stderr.write('[' + time.strftime("%Y-%m-%d %H:%M:%S") + '] ' + text + '\n')
+
+def error(text):
+    sys.stderr.write('Error: ' + text + '\n')
+    exit(2)
+
+def file_hash(path, chunksize = 1 << 20):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunksize), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+# returns a hash of the source code of the package so that cached outputs are not reused across versions
+def code_hash():
+    h = hashlib.sha1()
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(__file__), '*.py'))):
+        h.update(file_hash(path).encode('UTF-8'))
+    return h.hexdigest()
+
+# returns the names of the stages whose outputs a stage uses
+def get_deps(stage):
+    return [arg[1:] for arg in stage['args'] if arg.startswith('@') and arg != out_ref]
+
+# returns the stages in an order where each stage comes after the stages it depends on
+def get_order(stages):
+    order, visiting = [], set()
+    def visit(name, path):
+        if name in order:
+            return
+        if name in visiting:
+            error('stages ' + ' -> '.join(path + [name]) + ' form a cycle')
+        visiting.add(name)
+        for dep in get_deps(stages[name]):
+            if not dep in stages:
+                error('stage ' + name + ' uses the output of unknown stage ' + dep)
+            visit(dep, path + [name])
+        order.append(name)
+    for name, stage in stages.items():
+        if not stage.get('command') in commands or stage['command'] == 'pipeline':
+            error('stage ' + name + ' has unknown command ' + str(stage.get('command')))
+        if not out_ref in stage.get('args', []):
+            error('stage ' + name + ' does not write its output to ' + out_ref)
+        visit(name, [])
+    return order
+
+# returns a key for the output of a stage from its command, its arguments, and the contents of its input files
+# outputs of other stages are identified by their contents only, so that stages downstream of a stage
+# that was run again but whose output did not change are not run again
+def get_key(stage, outputs, code):
+    h = hashlib.sha1((code + '\n' + stage['command'] + '\n').encode('UTF-8'))
+    for arg in stage['args']:
+        if arg != out_ref and arg.startswith('@'):
+            text = 'output:' + file_hash(outputs[arg[1:]])
+        elif os.path.isfile(arg):
+            text = 'file:' + arg + ':' + file_hash(arg)
+        else:
+            text = 'arg:' + arg
+        h.update((text + '\n').encode('UTF-8'))
+    return h.hexdigest()
+
+# output files take the extension of the requested output so that tables are written in the requested format
+def get_ext(stage):
+    return os.path.splitext(stage.get('output', ''))[1] or stage.get('ext', '.tsv')
+
+def run_stage(command, argv):
+    importlib.import_module('.' + command, __package__).main(argv)
+
+# copies the cached output of a stage to the requested output file unless it is already there
+def copy_output(path, output):
+    if output and (not os.path.exists(output) or os.path.getmtime(output) != os.path.getmtime(path)):
+        shutil.copy2(path, output)
+
+# runs the stages of a pipeline, reusing the cached outputs of stages whose inputs did not change
+# and running stages that do not depend on each other in parallel
+def run_pipeline(config, jobs = None, dry_run = False, verbose = True):
+    stages = config['stages']
+    cachedir = config.get('cache', 'pipeline.cache')
+    pending = get_order(stages)
+    code = code_hash()
+    os.makedirs(cachedir, exist_ok = True)
+    outputs, running, executed = dict(), dict(), list()
+    with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+        while pending or running:
+            ready = [name for name in pending if all(dep in outputs for dep in get_deps(stages[name]))]
+            for name in ready:
+                pending.remove(name)
+                stage = stages[name]
+                # in a dry run stages downstream of stages that would run are assumed to run as well
+                if any(outputs[dep] is None for dep in get_deps(stage)):
+                    log('Would run ' + name)
+                    outputs[name] = None
+                    continue
+                path = os.path.join(cachedir, name + '.' + get_key(stage, outputs, code) + get_ext(stage))
+                if os.path.exists(path):
+                    if verbose:
+                        log('Reusing ' + name + ' from ' + path)
+                    outputs[name] = path
+                    if not dry_run:
+                        copy_output(path, stage.get('output'))
+                elif dry_run:
+                    log('Would run ' + name)
+                    outputs[name] = None
+                else:
+                    tmp = path[:-len(get_ext(stage))] + '.tmp' + get_ext(stage)
+                    argv = [tmp if arg == out_ref else outputs[arg[1:]] if arg.startswith('@') else arg for arg in stage['args']]
+                    if verbose:
+                        log('Running ' + name + ': ' + ' '.join([stage['command']] + argv))
+                    running[executor.submit(run_stage, stage['command'], argv)] = (name, tmp, path, time.time())
+            if ready or not running:
+                continue
+            done, not_done = concurrent.futures.wait(running, return_when = concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                name, tmp, path, start = running.pop(future)
+                exc = future.exception()
+                if exc is not None and not (isinstance(exc, SystemExit) and not exc.code):
+                    error('stage ' + name + ' failed: ' + repr(exc))
+                os.replace(tmp, path)
+                if verbose:
+                    log('Finished ' + name + ' in ' + '%.1f' % (time.time() - start) + ' seconds')
+                outputs[name] = path
+                executed.append(name)
+                copy_output(path, stages[name].get('output'))
+    return executed
+
+def get_parser():
+    parser = argparse.ArgumentParser(description = 'Run a pipeline of subcommands with cached outputs (16 Aug 2018)', add_help = False, usage = 'getmydnamatches pipeline -c <config> [options]')
+    parser.add_argument('-c', metavar = '<FILE>', required = True, type = str, help = 'pipeline configuration in JSON format')
+    parser.add_argument('-j', metavar = '<INT>', type = int, help = 'maximum number of stages to run in parallel [number of CPUs]')
+    parser.add_argument('-n', action = 'store_true', default = False, help = 'whether to only print the stages that would run [False]')
+    parser.add_argument('-v', action = 'store_false', default = True, help = 'whether to use verbose mode [True]')
+    return parser
+
+def main(argv = None):
+    parser = get_parser()
+
+    # extract arguments from the command line
+    try:
+        parser.error = parser.exit
+        args = parser.parse_args(argv)
+    except SystemExit:
+        parser.print_help()
+        exit(2)
+
+    with open(args.c) as f:
+        config = json.load(f)
+    run_pipeline(config, args.j, args.n, args.v)
+
+if __name__ == '__main__':
+    main()
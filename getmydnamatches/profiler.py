@@ -0,0 +1,130 @@
+"""
+   profiler.py - Stage timers and profiles of a run written to a JSON report
+   Copyright (C) 2015-2018 Giulio Genovese (giulio.genovese@gmail.com)
+
+   This program is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+   Written by Giulio Genovese <giulio.genovese@gmail.com>
+"""
+
+import sys, time, json, atexit, contextlib
+
+# adds the --profile option shared by all subcommands
+def add_argument(parser):
+    parser.add_argument('--profile', metavar = '<STR>', nargs = '*', choices = ['cprofile', 'tracemalloc'],
+                        help = 'write wall and CPU times of each stage to a JSON report next to the outputs, optionally with cProfile statistics and tracemalloc peak memory of each stage')
+
+# returns the prefix of the report from the output of a subcommand, either a file, a file name, or a prefix
+# outputs written to the standard output give a report in the current directory named after the subcommand
+def get_prefix(out, command):
+    name = getattr(out, 'name', out)
+    return name if isinstance(name, str) and not name.startswith('<') else command
+
+# records the time spent in each stage of a run, doing nothing unless started
+# stages used inside other stages are timed, but only outermost stages are profiled
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.marked = None
+
+    def start(self, command, options, prefix):
+        self.enabled = options is not None
+        if not self.enabled:
+            return
+        self.command = command
+        self.prefix = prefix
+        self.stages = dict()
+        self.profiles = dict() if 'cprofile' in options else None
+        self.trace = 'tracemalloc' in options
+        self.depth = 0
+        if self.trace:
+            import tracemalloc
+            tracemalloc.start()
+        self.time = time.time()
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        # runs that exit early still leave a report
+        atexit.register(self.stop)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        if not self.enabled:
+            yield
+            return
+        outer = self.depth == 0
+        self.depth += 1
+        if outer and self.trace:
+            import tracemalloc
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+        if outer and self.profiles is not None:
+            if not name in self.profiles:
+                import cProfile
+                self.profiles[name] = cProfile.Profile()
+            self.profiles[name].enable()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            if outer and self.profiles is not None:
+                self.profiles[name].disable()
+            self.depth -= 1
+            stage = self.stages.setdefault(name, {'calls': 0, 'seconds': 0.0, 'cpu_seconds': 0.0, 'outer': outer})
+            stage['calls'] += 1
+            stage['seconds'] += wall
+            stage['cpu_seconds'] += cpu
+            if outer and self.trace:
+                import tracemalloc
+                stage['peak_mb'] = max(stage.get('peak_mb', 0), tracemalloc.get_traced_memory()[1] / 2**20)
+
+    # ends the current marked stage and starts the next one, so that a sequence of steps is timed without nesting blocks
+    def mark(self, name = None):
+        if self.marked:
+            self.marked.__exit__(None, None, None)
+            self.marked = None
+        if name and self.enabled:
+            self.marked = self.stage(name)
+            self.marked.__enter__()
+
+    # writes the report, with the profiles of each stage in files with the same prefix
+    def stop(self):
+        self.mark()
+        if not self.enabled:
+            return
+        self.enabled = False
+        atexit.unregister(self.stop)
+        wall, cpu = time.perf_counter() - self.wall, time.process_time() - self.cpu
+        report = {'command': self.command, 'start': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.time)), 'seconds': wall, 'cpu_seconds': cpu}
+        # time not spent in any stage, such as starting up and parsing arguments
+        report['other'] = {'seconds': wall - sum(stage['seconds'] for stage in self.stages.values() if stage['outer']),
+                           'cpu_seconds': cpu - sum(stage['cpu_seconds'] for stage in self.stages.values() if stage['outer'])}
+        try:
+            import resource
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            report['maxrss_mb'] = maxrss / 2**20 if sys.platform == 'darwin' else maxrss / 2**10
+        except ImportError:
+            pass
+        if self.trace:
+            import tracemalloc
+            report['peak_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+        report['stages'] = self.stages
+        for name, profile in (self.profiles if self.profiles is not None else dict()).items():
+            self.stages[name]['cprofile'] = self.prefix + '.' + name + '.prof'
+            profile.dump_stats(self.stages[name]['cprofile'])
+        with open(self.prefix + '.profile.json', 'w') as f:
+            json.dump(report, f, indent = 2)
+
+profiler = Profiler()
@@ -0,0 +1,127 @@
+"""
+   relationships.py - Estimate relationships from shared centiMorgans and segments
+   Copyright (C) 2015-2018 Giulio Genovese (giulio.genovese@gmail.com)
+
+   This program is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+   Written by Giulio Genovese <giulio.genovese@gmail.com>
+"""
+
+from .lazy import lazy_import
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+# classes of relationships with their number of meioses as in AncestryDNA meiosisValue and graph2plot.py, their
+# average and 99% range of shared centiMorgans from the Shared cM Project (Bettinger, version 4, 2020) pooling
+# relationships of the same degree, and their approximate average number of shared segments
+table = [('PARENT',                     1, 3485, 2376, 3720, 27),
+         ('SIBLING',                    1, 2613, 1613, 3488, 40),
+         ('GRANDPARENT',                2, 1750,  984, 2462, 27),
+         ('FIRST_COUSIN',               3,  866,  330, 1486, 20),
+         ('FIRST_COUSIN_ONCE_REMOVED',  4,  440,  102,  980, 14),
+         ('SECOND_COUSIN',              5,  225,   33,  592,  9),
+         ('SECOND_COUSIN_ONCE_REMOVED', 6,  121,    9,  397,  6),
+         ('THIRD_COUSIN',               7,   73,    6,  261,  4),
+         ('THIRD_COUSIN_ONCE_REMOVED',  8,   48,    6,  192,  3),
+         ('FOURTH_COUSIN',              9,   35,    6,  139,  2),
+         ('DISTANT_COUSIN',            10,   25,    6,  117,  1.5)]
+
+# number of meioses of each relationship predicted by 23andMe
+rel_alg = {'AUNT': 2,
+           'BROTHER': 1,
+           'DAUGHTER': 1,
+           'DISTANT_COUSIN': 10,
+           'FATHER': 1,
+           'FIFTH_COUSIN': 9,
+           'FIRST_COUSIN': 3,
+           'FOURTH_COUSIN': 9,
+           'GRANDDAUGHTER': 2,
+           'GRANDFATHER': 2,
+           'GRANDMOTHER': 2,
+           'GRANDSON': 2,
+           'MOTHER': 1,
+           'NEPHEW': 2,
+           'NIECE': 2,
+           'SECOND_COUSIN': 5,
+           'SISTER': 1,
+           'SIXTH_COUSIN': 10,
+           'SON': 1,
+           'THIRD_COUSIN': 7,
+           'UNCLE': 2}
+
+# physical lengths are converted using the genome-wide average recombination rate
+cm_per_mb = 1.18
+
+# spread of segment counts on a log scale, as counts are overdispersed across testing companies
+segments_sigma = .4
+
+# number of most likely classes output for each pair
+top_classes = 3
+
+# number of pairs processed at once, bounding the memory of the likelihood matrix
+chunksize = 2**18
+
+# returns the log-normal parameters of the shared centiMorgans of each class from its average and 99% range
+def get_parameters():
+    names = np.array([row[0] for row in table], dtype = object)
+    meiosis, mean, low, high, segments = (np.array([row[i] for row in table], dtype = float) for i in range(1, 6))
+    sigma = (np.log(high) - np.log(low)) / (2 * 2.576)
+    return names, meiosis, np.log(mean) - sigma**2 / 2, sigma, np.log(segments)
+
+# returns the log-likelihood of each class for each pair, ignoring the segments where their number is missing
+def get_loglik(cm, segments = None):
+    names, meiosis, mu, sigma, logseg = get_parameters()
+    x = np.log(np.maximum(cm, 1))[:, None]
+    loglik = -np.log(sigma) - (x - mu)**2 / (2 * sigma**2)
+    if segments is not None:
+        y = np.log(np.maximum(segments, .5))[:, None]
+        loglik += np.where(np.isnan(y), 0, -(y - logseg)**2 / (2 * segments_sigma**2))
+    return loglik
+
+# returns the most likely classes of relationship of each pair, the first with its number of meioses, each with its
+# posterior probability under equal prior probabilities, leaving pairs with missing centiMorgans unassigned
+def estimate(cm, segments = None, top = top_classes):
+    names, meiosis = get_parameters()[:2]
+    top = min(top, len(names))
+    cm = np.asarray(cm, dtype = float)
+    segments = np.asarray(segments, dtype = float) if segments is not None else None
+    best = np.zeros((len(cm), top), dtype = int)
+    prob = np.full((len(cm), top), np.nan)
+    for start in range(0, len(cm), chunksize):
+        end = start + chunksize
+        loglik = get_loglik(cm[start:end], segments[start:end] if segments is not None else None)
+        post = np.exp(loglik - loglik.max(axis = 1, keepdims = True))
+        post /= post.sum(axis = 1, keepdims = True)
+        best[start:end] = np.argsort(-post, axis = 1, kind = 'stable')[:, :top]
+        prob[start:end] = np.take_along_axis(post, best[start:end], axis = 1)
+    missing = np.isnan(cm)
+    rel = pd.DataFrame({'meiosis': pd.Series(np.where(missing, np.nan, meiosis[best[:, 0]])).astype('Int64')})
+    for k in range(top):
+        suffix = '_' + str(k + 1) if k > 0 else ''
+        rel['relationship' + suffix] = np.where(missing, None, names[best[:, k]])
+        rel['rel_prob' + suffix] = np.where(missing, np.nan, prob[:, k])
+    return rel
+
+# adds the estimated relationships of the pairs of a graph file from ancestry2graph.py or ibdview2graph.py
+def add_relationships(df):
+    if 'seg_cm' in df or 'cm' in df:
+        cm = df['seg_cm' if 'seg_cm' in df else 'cm'].values.astype(float)
+    else:
+        cm = df['mb'].values.astype(float) * cm_per_mb
+    rel = estimate(cm, df['segments'].values if 'segments' in df else None)
+    df = df.copy()
+    for key in rel:
+        df[key] = rel[key].values
+    return df
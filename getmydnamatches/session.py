@@ -0,0 +1,81 @@
+"""
+   session.py - HTTP session with retries and logging shared by the download subcommands
+   Copyright (C) 2015-2018 Giulio Genovese (giulio.genovese@gmail.com)
+
+   This program is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+   Written by Giulio Genovese <giulio.genovese@gmail.com>
+"""
+
+import time
+from .lazy import lazy_import
+
+requests = lazy_import('requests')
+
+class Session:
+    def __init__(self, verbose, logfile, timeout):
+        self.verbose = verbose
+        self.logfile = logfile
+        self.timeout = timeout
+        self.retry = 0
+        self.s = requests.Session()
+
+    def log(self, text, force = False):
+        if self.verbose or force:
+            self.logfile.write('[' + time.strftime("%Y-%m-%d %H:%M:%S") + '] ' + text + '\n')
+
+    # logs the start of a request, which is not logged unless a site logs it
+    def log_start(self, url):
+        pass
+
+    # logs an event of a request after its url
+    def log_event(self, url, text):
+        self.log(url + ' ' + text)
+
+    # logs the status code of the response to a request
+    def log_status(self, url, status_code):
+        self.log_event(url, 'Status code ' + str(status_code))
+
+    # sends a request until the server answers, waiting before retrying after a connection error
+    def request(self, method, url, **kwargs):
+        while True:
+            self.log_start(url)
+            try:
+                r = self.s.request(method, url, timeout = self.timeout, **kwargs)
+            except requests.exceptions.ReadTimeout:
+                self.log_event(url, 'Read timed out')
+                self.retry += 1
+                continue
+            except requests.exceptions.ConnectionError:
+                self.log_event(url, 'Connection aborted')
+                time.sleep(self.timeout)
+                self.retry += 1
+                continue
+            self.log_status(url, r.status_code)
+            return r
+
+    # returns the current cookies of the session as a dictionary
+    def get_cookies(self):
+        return requests.utils.dict_from_cookiejar(self.s.cookies)
+
+    # returns whether the response is an HTTP error, waiting before the request is retried
+    def http_error(self, r, url):
+        try:
+            r.raise_for_status()
+        except requests.exceptions.HTTPError:
+            self.log_event(url, 'HTTPError')
+            time.sleep(self.timeout)
+            self.retry += 1
+            return True
+        return False
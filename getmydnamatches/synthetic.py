@@ -0,0 +1,128 @@
+"""
+   synthetic.py - Synthetic AncestryDNA and 23andMe data sets of configurable size
+   Copyright (C) 2015-2018 Giulio Genovese (giulio.genovese@gmail.com)
+
+   This program is free software: you can redistribute it and/or modify
+   it under the terms of the GNU General Public License as published by
+   the Free Software Foundation, either version 3 of the License, or
+   (at your option) any later version.
+
+   This program is distributed in the hope that it will be useful,
+   but WITHOUT ANY WARRANTY; without even the implied warranty of
+   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+   GNU General Public License for more details.
+
+   You should have received a copy of the GNU General Public License
+   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+   Written by Giulio Genovese <giulio.genovese@gmail.com>
+"""
+
+import os
+from .lazy import lazy_import
+from .dnaio import write_table
+from .ancestry2graph import get_owner
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+chroms = [str(chrom) for chrom in range(1, 23)] + ['X']
+
+# returns the distinct keys and the values joined by a separator for each key
+def join_groups(keys, values, sep):
+    order = np.argsort(keys, kind = 'stable')
+    keys, values = np.asarray(keys)[order], np.asarray(values, dtype = object)[order]
+    if len(keys) == 0:
+        return keys, []
+    bounds = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+    return keys[np.concatenate([[0], bounds])], [sep.join(chunk) for chunk in np.split(values, bounds)]
+
+# returns the family of each individual, with family sizes drawn from a geometric distribution
+def get_families(n, rng, mean_size = 50):
+    sizes = rng.geometric(1 / mean_size, size = n)
+    families = np.repeat(np.arange(n), sizes)[:n]
+    return rng.permutation(families)
+
+# returns pairs of individuals from the same family, drawing a random number of relatives for each individual
+def get_relatives(families, counts, rng):
+    order = np.argsort(families, kind = 'stable')
+    size = np.bincount(families)
+    start = np.cumsum(size) - size
+    i = np.repeat(np.arange(len(families)), counts)
+    j = order[start[families[i]] + rng.integers(0, size[families[i]])]
+    pairs = pd.DataFrame({'i': i, 'j': j})
+    pairs = pairs[pairs['i'] != pairs['j']].drop_duplicates()
+    return pairs['i'].values, pairs['j'].values
+
+# returns an AncestryDNA matches table for a kit with n - 1 matches, where closer matches share
+# more centiMorgans and matches sharing at least 20 centiMorgans have lists of matches in common
+def get_ancestry_matches(n, rng):
+    guids = np.array(['%08X-%04X-%04X-%04X-%012X' % tuple(x) for x in rng.integers(0, [2**32, 2**16, 2**16, 2**16, 2**48], size = (n, 5))])
+    meiosis = rng.choice(np.arange(1, 11), size = n, p = 2.0 ** np.arange(1, 11) / (2.0 ** np.arange(1, 11)).sum())
+    cm = np.maximum(3400 / 2.0 ** (meiosis - 1) * rng.lognormal(0, .3, size = n), 6).round(1)
+    families = get_families(n, rng)
+    side = rng.integers(0, 3, size = families.max() + 1)[families]
+    i, j = get_relatives(families, np.where(cm >= 20, rng.poisson(10, size = n), 0), rng)
+    icw = pd.Series(*join_groups(i, guids[j], ',')[::-1]).reindex(np.arange(n))
+    admin = rng.random(n) < .9
+    df = pd.DataFrame({'testGuid': guids,
+                       'matchTestDisplayName': ['Name ' + str(i) for i in range(n)],
+                       'subjectGender': np.where(rng.random(n) < .5, 'Male', 'Female'),
+                       'meiosisValue': meiosis,
+                       'sharedCentimorgans': cm,
+                       'matchTestSubjectIsAdmin': admin,
+                       'matchTestAdminDisplayName': np.where(admin, None, ['Admin ' + str(i) for i in range(n)]),
+                       'hasHint': rng.random(n) < .05,
+                       'patside': side == 1,
+                       'matside': side == 2,
+                       'matchesInCommon': icw.values,
+                       'sharedSegments': pd.array(np.maximum(cm / 15, 1).astype(int), dtype = 'Int64')})
+    # the last row is the owner of the kit, as in the tables written by getmyancestrydna
+    df.loc[n - 1, ['meiosisValue', 'sharedCentimorgans', 'matchTestSubjectIsAdmin', 'hasHint', 'patside', 'matside', 'matchesInCommon', 'sharedSegments']] = [0, np.nan, True, True, True, True, None, np.nan]
+    return df
+
+# returns a 23andMe inheritance table and an ibdview table with IBD segments between relatives
+def get_23andme_tables(n, rng, length = 150e6):
+    ehids = np.array(['%016x' % x for x in rng.integers(0, 2**63, size = n)])
+    genders = np.where(rng.random(n) < .5, 'Male', 'Female')
+    inheritance = pd.DataFrame({'people_ids': ehids, 'people_labels': ['Person ' + str(i) for i in range(n)], 'gender': genders})
+    families = get_families(n, rng)
+    i, j = get_relatives(families, rng.poisson(5, size = n), rng)
+    pairs = pd.DataFrame({'a': np.minimum(i, j), 'b': np.maximum(i, j)}).drop_duplicates()
+
+    # one to four segments per pair formatted as the JSON intervals of the ibdview table
+    pair = np.repeat(np.arange(len(pairs)), rng.integers(1, 5, size = len(pairs)))
+    start = rng.integers(0, int(length), size = len(pair))
+    end = np.minimum(start + rng.lognormal(np.log(10e6), .5, size = len(pair)), length).astype(int)
+    chrom = rng.integers(0, len(chroms), size = len(pair))
+    keys, text = join_groups(pair * len(chroms) + chrom, '[' + pd.Series(start).astype(str) + ', ' + pd.Series(end).astype(str) + ']', ', ')
+    text = '"' + pd.Series(np.array(chroms)[keys % len(chroms)]) + '": [[' + pd.Series(text, dtype = object) + ']]'
+    # chromosome X is always listed as it is needed to correct sharing between males
+    nox = np.setdiff1d(np.arange(len(pairs)), keys[keys % len(chroms) == len(chroms) - 1] // len(chroms))
+    keys, intervals = join_groups(np.concatenate([keys // len(chroms), nox]), np.concatenate([text.values, np.repeat('"X": [[]]', len(nox))]), ', ')
+    intervals = ['{' + x + '}' for x in intervals]
+    ibdview = pd.DataFrame({'p1': ehids[pairs['a']], 'p2': ehids[pairs['b']], 'intervals': intervals})
+    return inheritance, ibdview
+
+# returns a genetic map in PLINK format with about one marker every 100 kbp and varying recombination rates
+def get_genetic_map(chrom, rng, length = 150e6, step = 1e5):
+    bp = np.arange(0, length + step, step).astype(int)
+    cm = np.concatenate([[0], np.cumsum(rng.gamma(2, .6, size = len(bp) - 1) * step / 1e6)])
+    return pd.DataFrame({'CHR': chrom, 'ID': ['rs' + chrom + '_' + str(x) for x in bp], 'CM': cm.round(6), 'BP': bp})
+
+# writes a synthetic data set of n individuals to a directory and returns a description of its files
+def write_dataset(path, n, seed = 0, ext = '.tsv'):
+    rng = np.random.default_rng(seed)
+    os.makedirs(path, exist_ok = True)
+    files = {'matches': os.path.join(path, 'matches' + ext),
+             'inheritance': os.path.join(path, 'inheritance' + ext),
+             'ibdview': os.path.join(path, 'ibdview' + ext),
+             'maps': [os.path.join(path, 'chr' + chrom + '.map') for chrom in chroms]}
+    matches = get_ancestry_matches(n, rng)
+    write_table(matches, files['matches'])
+    inheritance, ibdview = get_23andme_tables(n, rng)
+    write_table(inheritance, files['inheritance'])
+    write_table(ibdview, files['ibdview'])
+    for chrom, f in zip(chroms, files['maps']):
+        get_genetic_map(chrom, rng).to_csv(f, sep = ' ', header = False, index = False)
+    return {'size': n, 'seed': seed, 'user': get_owner(matches), 'files': files}
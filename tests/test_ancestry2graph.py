@@ -0,0 +1,46 @@
+import pytest
+import pandas as pd
+from getmydnamatches.ancestry2graph import get_owner, get_edges, get_graph
+
+# matches table as written by getmyancestrydna.py, with the owner of the kit added as the last row
+def get_matches():
+    return pd.DataFrame({'testGuid': ['G1', 'G2', 'G3', 'G0'],
+                         'matchTestDisplayName': ['Name 1', 'Name 2', 'Name 3', 'Name 0'],
+                         'subjectGender': ['Female', 'Male', 'Female', 'Male'],
+                         'meiosisValue': [3.0, 5.0, 7.0, 0.0],
+                         'sharedCentimorgans': [900.0, 200.0, 50.0, float('nan')],
+                         'matchTestSubjectIsAdmin': [True, True, True, True],
+                         'matchTestAdminDisplayName': ['Admin 1', 'Admin 2', 'Admin 3', 'Admin 0'],
+                         'matchesInCommon': ['G2', 'G1,G3', 'G2', None]})
+
+def test_owner_last_row():
+    assert get_owner(get_matches()) == 'G0'
+
+def test_edges_owner_last_row():
+    edges = get_edges(get_matches())
+    user = edges[edges['seg_cm'].notnull()]
+    assert set(user['human_id_1']) == {'G0'}
+    assert sorted(user['human_id_2']) == ['G1', 'G2', 'G3']
+    assert user.set_index('human_id_2')['seg_cm'].to_dict() == {'G1': 900.0, 'G2': 200.0, 'G3': 50.0}
+    assert len(edges) == 5
+
+def test_graph_owner_is_hub():
+    df = get_graph([get_matches()])
+    counts = pd.concat([df['name_1'], df['name_2']]).value_counts()
+    assert counts['Name 0'] == 3
+    assert counts['Name 1'] == 2
+
+def test_graph_segments():
+    df = get_matches()
+    df['sharedSegments'] = [30.0, 9.0, 4.0, float('nan')]
+    df = get_graph([df])
+    user = df[df['human_id_1'] == 'G0'].set_index('human_id_2')
+    assert user['segments'].to_dict() == {'G1': 30.0, 'G2': 9.0, 'G3': 4.0}
+    assert df.loc[df['human_id_1'] != 'G0', 'segments'].isnull().all()
+    assert user.loc['G1', 'relationship'] == 'FIRST_COUSIN'
+    assert (user['rel_prob'] >= user['rel_prob_2']).all() and (user['rel_prob_2'] >= user['rel_prob_3']).all()
+
+def test_no_owner():
+    df = get_matches()
+    with pytest.raises(ValueError):
+        get_owner(df[df['testGuid'] != 'G0'])
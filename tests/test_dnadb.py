@@ -0,0 +1,38 @@
+import pytest
+pytest.importorskip('scipy')
+from getmydnamatches.dnadb import MatchDB
+from test_ancestry2graph import get_matches
+
+# database with a single kit whose owner G0 is the last row of its matches table, G2 sharing with G1 and G3
+@pytest.fixture
+def db(tmp_path):
+    df = get_matches()
+    df['patside'] = [True, True, False, True]
+    df['matside'] = [False, False, True, True]
+    db = MatchDB(str(tmp_path / 'matches.db'))
+    db.add_table(df)
+    yield db
+    db.close()
+
+def test_kit(db):
+    df = db.get_matches('G0')
+    assert df['id'].tolist() == ['G1', 'G2', 'G3']
+    assert df['cm'].tolist() == [900.0, 200.0, 50.0]
+    assert db.get_matches('G1').empty
+
+def test_common(db):
+    df = db.get_common(['G1'])
+    assert df['id'].tolist() == ['G2']
+    assert df[['name', 'kit', 'cm']].values.tolist() == [['Name 2', 'G0', 200.0]]
+    assert db.get_common(['G1', 'G3'])['id'].tolist() == ['G2']
+    assert db.get_common(['G2'])['id'].tolist() == ['G1', 'G3']
+    assert db.get_common(['G2'], min_cm = 100)['id'].tolist() == ['G1']
+    assert db.get_common(['G2'], side = 'mat')['id'].tolist() == ['G3']
+    assert db.get_common(['G2'], side = 'pat')['id'].tolist() == ['G1']
+
+def test_path(db):
+    df = db.get_path('G1', 'G3', exclude = ['G0'])
+    assert df['id'].tolist() == ['G1', 'G2', 'G3']
+    assert df['name'].tolist() == ['Name 1', 'Name 2', 'Name 3']
+    assert db.get_path('G1', 'G3', max_hops = 1, exclude = ['G0']).empty
+    assert len(db.get_path('G1', 'G3')) == 3
@@ -0,0 +1,65 @@
+import pytest
+import numpy as np
+import pandas as pd
+pytest.importorskip('scipy')
+from getmydnamatches.dnagraph import get_adjacency, propagate_side, topk_edges, kcore_edges, ego_edges, louvain, modularity
+
+# path graph A - B - C - D with a weak edge between B and C
+def get_path():
+    return pd.DataFrame({'human_id_1': ['A', 'B', 'C'], 'human_id_2': ['B', 'C', 'D'], 'seg_cm': [100.0, 10.0, 100.0]})
+
+def test_propagate_side_hops():
+    ids, adj = get_adjacency(get_path())
+    seeds = ids.isin(['A'])
+    score = pd.Series(propagate_side(adj, seeds, 1), index = ids)
+    assert score['A'] == 1.0
+    assert score['B'] == pytest.approx(100 / 110)
+    assert score['C'] == 0.0 and score['D'] == 0.0
+    score = pd.Series(propagate_side(adj, seeds, 3), index = ids)
+    assert (score > 0).all()
+    assert score['B'] > score['C'] >= score['D']
+
+def test_propagate_side_bounded():
+    ids, adj = get_adjacency(get_path())
+    score = propagate_side(adj, ids.isin(['A', 'D']), 10)
+    assert ((score >= 0) & (score <= 1)).all()
+    assert np.allclose(score, 1.0)
+
+# triangle A - B - C with a tail C - D - E and an isolated pair F - G
+def get_graph():
+    return pd.DataFrame({'human_id_1': ['A', 'A', 'B', 'C', 'D', 'F'], 'human_id_2': ['B', 'C', 'C', 'D', 'E', 'G'],
+                         'seg_cm': [50.0, 40.0, 30.0, 20.0, 10.0, float('nan')]})
+
+def test_topk_edges():
+    # each node keeps its strongest edge, with the missing weight taken as the median
+    assert topk_edges(get_graph(), 1).tolist() == [True, True, False, True, True, True]
+    assert topk_edges(get_graph(), 2).all()
+
+def test_kcore_edges():
+    assert kcore_edges(get_graph(), 2).tolist() == [True, True, True, False, False, False]
+    assert not kcore_edges(get_graph(), 3).any()
+    assert kcore_edges(get_graph(), 1).all()
+
+def test_ego_edges():
+    assert ego_edges(get_graph(), ['E'], 1).tolist() == [False, False, False, False, True, False]
+    assert ego_edges(get_graph(), ['E'], 2).tolist() == [False, False, False, True, True, False]
+    assert ego_edges(get_graph(), ['A', 'G'], 1).tolist() == [True, True, True, False, False, True]
+
+# two cliques of four nodes joined by a single weak edge
+def get_cliques():
+    pairs = [(a + str(i), a + str(j)) for a in 'AB' for i in range(4) for j in range(i + 1, 4)] + [('A0', 'B0')]
+    return pd.DataFrame({'human_id_1': [p[0] for p in pairs], 'human_id_2': [p[1] for p in pairs],
+                         'seg_cm': [100.0] * (len(pairs) - 1) + [10.0]})
+
+def test_louvain_cliques():
+    ids, adj = get_adjacency(get_cliques())
+    labels = pd.Series(louvain(adj), index = ids)
+    assert labels[['A0', 'A1', 'A2', 'A3']].nunique() == 1
+    assert labels[['B0', 'B1', 'B2', 'B3']].nunique() == 1
+    assert labels['A0'] != labels['B0']
+    assert modularity(adj, labels.values) > modularity(adj, np.zeros(len(ids), dtype = int))
+    assert modularity(adj, labels.values) == pytest.approx(1200 / 1210 - .5)
+
+def test_louvain_empty():
+    ids, adj = get_adjacency(get_cliques().iloc[:0])
+    assert len(louvain(adj)) == 0
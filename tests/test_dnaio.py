@@ -0,0 +1,47 @@
+import pytest
+import pandas as pd
+from getmydnamatches.dnaio import read_table, write_table
+
+# AncestryDNA matches table with the owner of the kit as the last row
+def get_matches():
+    return pd.DataFrame({'testGuid': ['001', 'G2', 'G0'], 'matchTestDisplayName': ['Name 1', 'Name 2', 'Name 0'],
+                         'sharedCentimorgans': [900.0, 20.5, float('nan')], 'sharedSegments': pd.array([30, 2, None], dtype = 'Int64'),
+                         'meiosisValue': [3, 9, 0], 'matchTestSubjectIsAdmin': [True, False, True], 'matchesInCommon': ['G2', None, None]})
+
+# AncestryDNA ethnicity table as written by getmyancestrydna.py -x
+def get_ethnicity():
+    return pd.DataFrame({'testGuid': ['G1', 'G1', 'G2'], 'group': ['ethnicity', 'ethnicity', 'communities'],
+                         'region': ['england', 'ireland', 'england'], 'percent': [60.0, 40.0, None]})
+
+@pytest.mark.parametrize('ext', ['tsv', 'parquet', 'feather'])
+def test_round_trip(tmp_path, ext):
+    if ext != 'tsv':
+        pytest.importorskip('pyarrow')
+    write_table(get_matches(), str(tmp_path / ('matches.' + ext)))
+    df = read_table(str(tmp_path / ('matches.' + ext)))
+    assert df['testGuid'].tolist() == ['001', 'G2', 'G0']
+    assert df['sharedSegments'].dtype == float and df['sharedSegments'].tolist()[:2] == [30.0, 2.0]
+    assert df['sharedSegments'].isnull().tolist() == [False, False, True]
+    assert df['meiosisValue'].dtype == float
+    assert df['matchesInCommon'].isnull().tolist() == [False, True, True]
+    write_table(get_ethnicity(), str(tmp_path / ('ethnicity.' + ext)))
+    df = read_table(str(tmp_path / ('ethnicity.' + ext)))
+    assert isinstance(df['region'].dtype, pd.CategoricalDtype)
+    assert df['region'].tolist() == ['england', 'ireland', 'england']
+
+def test_legacy_shared_segments(tmp_path):
+    # getmyancestrydna.py -x formerly wrote the list of shared segments as text, and 0 for no segments
+    df = get_matches()
+    df['sharedSegments'] = ["[{'chr': 1, 'startCM': 0.0}, {'chr': 2, 'startCM': 5.5}]", '0', 'not a list']
+    df.to_csv(tmp_path / 'legacy.tsv', sep = '\t', index = False)
+    df = read_table(str(tmp_path / 'legacy.tsv'))
+    assert df['sharedSegments'].iloc[:2].tolist() == [2.0, 0.0]
+    assert pd.isnull(df['sharedSegments'].iloc[2])
+
+def test_other_tables_keep_types(tmp_path):
+    # generic column names of declared types in other kinds of tables are left as they are read
+    pd.DataFrame({'group': ['a', 'b'], 'kind': [1, 2], 'segments': ['x', 'y']}).to_csv(tmp_path / 'other.tsv', sep = '\t', index = False)
+    df = read_table(str(tmp_path / 'other.tsv'))
+    assert not isinstance(df['group'].dtype, pd.CategoricalDtype)
+    assert df['kind'].tolist() == [1, 2]
+    assert df['segments'].tolist() == ['x', 'y']
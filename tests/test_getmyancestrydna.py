@@ -0,0 +1,32 @@
+import pytest
+import pandas as pd
+pytest.importorskip('requests')
+from getmydnamatches.getmyancestrydna import get_ethnicity_rows, get_segment_rows, get_ethnicity_table, get_segments_table
+from getmydnamatches.dnaio import read_table, write_table
+
+def test_ethnicity_table():
+    # groups are lists of regions, lists of regions with percentages, or percentages by region
+    ethnicity = {'comparisons': ['england', 'ireland'],
+                 'regions': [{'key': 'england', 'percent': 60}, {'region': 'ireland', 'percentage': 40}],
+                 'shared': {'england': 12.5}}
+    df = get_ethnicity_table(get_ethnicity_rows('G1', ethnicity) + get_ethnicity_rows('G2', {'regions': []}))
+    assert df.columns.tolist() == ['testGuid', 'group', 'region', 'percent']
+    assert df[['group', 'region']].values.tolist() == [['comparisons', 'england'], ['comparisons', 'ireland'], ['regions', 'england'],
+                                                      ['regions', 'ireland'], ['shared', 'england']]
+    assert df['percent'].tolist()[2:] == [60.0, 40.0, 12.5] and df['percent'].iloc[:2].isnull().all()
+    assert isinstance(df['region'].dtype, pd.CategoricalDtype) and len(df['region'].cat.categories) == 2
+
+def test_segments_table(tmp_path):
+    info = {'cadGroups': [{'id': 1, 'name': 'group'}],
+            'sharedSegments': [{'chr': 1, 'startCM': 0.5, 'lengthCM': 20.0}, {'chr': 2, 'startCM': 3.0, 'lengthCM': 8.5}]}
+    df = get_segments_table(get_segment_rows('G1', info) + get_segment_rows('G2', {'cadGroups': None, 'sharedSegments': 0}))
+    assert df['testGuid'].tolist() == ['G1', 'G1', 'G1']
+    assert df['kind'].tolist() == ['cadGroups', 'sharedSegments', 'sharedSegments']
+    assert df['lengthCM'].iloc[1:].tolist() == [20.0, 8.5] and pd.isnull(df['lengthCM'].iloc[0])
+    write_table(df, str(tmp_path / 'segments.tsv'))
+    df = read_table(str(tmp_path / 'segments.tsv'))
+    assert isinstance(df['kind'].dtype, pd.CategoricalDtype)
+    assert df['chr'].iloc[1:].tolist() == [1, 2]
+
+def test_segments_table_empty():
+    assert get_segments_table([]).columns.tolist() == ['testGuid', 'kind']
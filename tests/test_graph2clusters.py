@@ -0,0 +1,21 @@
+import pytest
+import pandas as pd
+pytest.importorskip('scipy')
+from getmydnamatches.graph2clusters import get_clusters, main
+
+def get_graph():
+    return pd.DataFrame({'human_id_1': ['A', 'A', 'B', 'C'], 'name_1': ['a', 'a', 'b', 'c'],
+                         'human_id_2': ['B', 'C', 'C', 'D'], 'name_2': ['b', 'c', 'c', 'd'], 'seg_cm': [50.0, 40.0, 30.0, 7.0]})
+
+def test_clusters():
+    out = get_clusters(get_graph(), exclude = ['D'])
+    assert sorted(out['human_id']) == ['A', 'B', 'C']
+    assert out['name'].tolist() == ['a', 'b', 'c']
+    assert (out['cluster'] == 0).all() and (out['size'] == 3).all()
+
+def test_clusters_no_edges(tmp_path):
+    get_graph().to_csv(tmp_path / 'graph.tsv', sep = '\t', index = False)
+    main(['-i', str(tmp_path / 'graph.tsv'), '-x', 'A', 'C', '-o', str(tmp_path / 'clusters.tsv')])
+    out = pd.read_csv(tmp_path / 'clusters.tsv', sep = '\t')
+    assert out.columns.tolist() == ['human_id', 'name', 'cluster', 'size']
+    assert len(out) == 0
@@ -0,0 +1,59 @@
+import io
+import pytest
+import numpy as np
+import pandas as pd
+from getmydnamatches.graph2matrix import get_coo, write_mtx, write_gexf, write_graphml
+
+# graph file as written by ibdview2graph.py, with the pair (A, B) listed twice
+def get_graph():
+    return pd.DataFrame({'p1': ['A', 'B', 'A', 'C'], 'l1': ['a', 'b', 'a', 'c'], 'g1': ['Male', 'Female', 'Male', 'Male'],
+                         'p2': ['B', 'C', 'C', 'A'], 'l2': ['b', 'c', 'c', 'a'], 'g2': ['Female', 'Male', 'Male', 'Male'],
+                         'mb': [10.0, 20.0, 30.0, 40.0]})
+
+def test_coo_lower_triangle():
+    row, col, value = get_coo(get_graph(), ['A', 'B', 'C'], 'p', 'mb')
+    assert (row > col).all()
+    # the later edge between A and C overwrites the earlier one
+    assert sorted(zip(row, col, value)) == [(1, 0, 10.0), (2, 0, 40.0), (2, 1, 20.0)]
+
+def test_coo_unknown_individual(capsys):
+    row, col, value = get_coo(get_graph(), ['A', 'B'], 'p', None)
+    assert list(zip(row, col, value)) == [(1, 0, 1.0)]
+    assert 'c, C not in input inheritance file' in capsys.readouterr().err
+
+def test_mtx():
+    f = io.StringIO()
+    write_mtx(f, ['A', 'B', 'C'], np.array([1, 2]), np.array([0, 1]), np.array([10.0, np.nan]))
+    lines = f.getvalue().splitlines()
+    assert lines[0] == '%%MatrixMarket matrix coordinate real symmetric'
+    assert lines[1:4] == ['% 1 A', '% 2 B', '% 3 C']
+    assert lines[4:] == ['3 3 2', '2 1 10.0', '3 2 nan']
+
+# node and edge tables as built by graph2matrix.py main() for gexf/graphml output
+def get_tables():
+    nodes = pd.DataFrame({'id': ['A', 'B', 'C'], 'label': ['a & b', 'b', 'c'], 'sex': ['Male', 'Female', None],
+                          'meiosis': pd.array([0, 3, None], dtype = 'Int64'), 'patside': pd.array([True, False, None], dtype = 'boolean')})
+    edges = pd.DataFrame({'source': ['A', 'B'], 'target': ['B', 'C'], 'weight': [10.0, 20.0], 'relationship': ['FIRST_COUSIN', None]})
+    return nodes, edges
+
+def test_gexf_networkx():
+    nx = pytest.importorskip('networkx')
+    f = io.StringIO()
+    write_gexf(f, *get_tables())
+    g = nx.read_gexf(io.BytesIO(f.getvalue().encode('UTF-8')))
+    assert sorted(g.nodes) == ['A', 'B', 'C']
+    assert g.nodes['A']['label'] == 'a & b'
+    assert g.nodes['B']['meiosis'] == 3 and g.nodes['A']['patside'] is True
+    assert 'meiosis' not in g.nodes['C'] and 'sex' not in g.nodes['C']
+    assert g.edges['A', 'B']['weight'] == 10.0
+    assert g.edges['A', 'B']['relationship'] == 'FIRST_COUSIN' and 'relationship' not in g.edges['B', 'C']
+
+def test_graphml_networkx():
+    nx = pytest.importorskip('networkx')
+    f = io.StringIO()
+    write_graphml(f, *get_tables())
+    g = nx.read_graphml(io.BytesIO(f.getvalue().encode('UTF-8')))
+    assert sorted(g.nodes) == ['A', 'B', 'C']
+    assert g.nodes['A'] == {'label': 'a & b', 'sex': 'Male', 'meiosis': 0, 'patside': True}
+    assert g.nodes['C'] == {'label': 'c'}
+    assert g.edges['B', 'C'] == {'weight': 20.0}
@@ -0,0 +1,23 @@
+import pytest
+import pandas as pd
+pytest.importorskip('matplotlib')
+from getmydnamatches.matches2plot import main
+
+# writes an AncestryDNA matches table with the given shared centiMorgans for matches G1, G2, ...
+def write_kit(path, cms):
+    pd.DataFrame({'testGuid': ['G' + str(i + 1) for i in range(len(cms))], 'sharedCentimorgans': cms}).to_csv(path, sep = '\t', index = False)
+
+def test_pair_labels(tmp_path):
+    write_kit(tmp_path / 'a.tsv', [10.0, 20.0, 50.0])
+    write_kit(tmp_path / 'b.tsv', [12.0, 18.0, 45.0])
+    main(['-a', str(tmp_path / 'a.tsv'), '-b', str(tmp_path / 'b.tsv'), '-li', 'kit a', 'kit b',
+          '-s', str(tmp_path / 'stats.tsv'), '-o', str(tmp_path / 'plot.pdf')])
+    stats = pd.read_csv(tmp_path / 'stats.tsv', sep = '\t')
+    assert stats['shared'].tolist() == [3]
+    assert (tmp_path / 'plot.pdf').stat().st_size > 0
+
+def test_wrong_number_of_labels(tmp_path, capsys):
+    with pytest.raises(SystemExit) as e:
+        main(['-a', 'a.tsv', '-b', 'b.tsv', '-li', 'kit a'])
+    assert e.value.code == 2
+    assert 'Error: 1 labels given for 2 tables' in capsys.readouterr().err
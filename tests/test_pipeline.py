@@ -0,0 +1,39 @@
+import os
+from getmydnamatches.pipeline import run_pipeline
+from test_ancestry2graph import get_matches
+
+# pipeline building a graph from a matches table and exporting it to GraphML
+def get_config(tmp_path):
+    return {'cache': str(tmp_path / 'cache'),
+            'stages': {'graph': {'command': 'ancestry2graph', 'args': ['-i', str(tmp_path / 'matches.tsv'), '-o', '@out']},
+                       'export': {'command': 'graph2matrix', 'args': ['-i', '@graph', '-f', 'graphml', '-o', '@out'],
+                                  'output': str(tmp_path / 'graph.graphml')}}}
+
+def test_cache_reuse(tmp_path):
+    get_matches().to_csv(tmp_path / 'matches.tsv', sep = '\t', index = False)
+    config = get_config(tmp_path)
+    assert run_pipeline(config, 1, verbose = False) == ['graph', 'export']
+    assert os.path.exists(tmp_path / 'graph.graphml')
+    assert run_pipeline(config, 1, verbose = False) == []
+    # the output is copied again from the cache when it is removed
+    os.remove(tmp_path / 'graph.graphml')
+    assert run_pipeline(config, 1, verbose = False) == []
+    assert os.path.exists(tmp_path / 'graph.graphml')
+
+def test_cache_invalidation(tmp_path):
+    df = get_matches()
+    df.to_csv(tmp_path / 'matches.tsv', sep = '\t', index = False)
+    config = get_config(tmp_path)
+    run_pipeline(config, 1, verbose = False)
+    df.loc[df['testGuid'] == 'G1', 'sharedCentimorgans'] = 850.0
+    df.to_csv(tmp_path / 'matches.tsv', sep = '\t', index = False)
+    assert run_pipeline(config, 1, dry_run = True, verbose = False) == []
+    assert run_pipeline(config, 1, verbose = False) == ['graph', 'export']
+    assert '>850.0<' in (tmp_path / 'graph.graphml').read_text()
+    # a change that leaves the graph as it was does not run the stages using the graph again
+    df.loc[df['testGuid'] == 'G1', 'matchTestAdminDisplayName'] = 'Admin'
+    df.to_csv(tmp_path / 'matches.tsv', sep = '\t', index = False)
+    assert run_pipeline(config, 1, verbose = False) == ['graph']
+    # a change in the arguments of a stage runs only that stage again
+    config['stages']['export']['args'] = ['-i', '@graph', '-f', 'gexf', '-o', '@out']
+    assert run_pipeline(config, 1, verbose = False) == ['export']
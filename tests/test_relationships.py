@@ -0,0 +1,31 @@
+import pytest
+import numpy as np
+import pandas as pd
+from getmydnamatches.relationships import estimate, add_relationships
+
+def test_estimate():
+    rel = estimate([3400.0, 850.0, 30.0, np.nan], [27.0, 20.0, np.nan, 3.0])
+    assert rel['meiosis'].dtype == 'Int64'
+    assert rel['meiosis'].tolist()[:3] == [1, 3, 9] and rel['meiosis'].isna().tolist() == [False, False, False, True]
+    assert rel['relationship'].tolist()[:2] == ['PARENT', 'FIRST_COUSIN']
+    assert rel['relationship_2'].iloc[0] == 'SIBLING'
+    assert rel.iloc[3, 1:].isnull().all()
+    # the probabilities of the most likely classes are in decreasing order and sum to at most one
+    probs = rel[['rel_prob', 'rel_prob_2', 'rel_prob_3']].values[:3]
+    assert (np.diff(probs, axis = 1) <= 0).all()
+    assert (probs.sum(axis = 1) <= 1 + 1e-12).all()
+
+def test_estimate_segments():
+    # with the same centiMorgans, more segments point to a closer relationship
+    rel = estimate([300.0, 300.0], [14.0, 6.0])
+    assert rel['meiosis'].iloc[0] < rel['meiosis'].iloc[1]
+
+def test_estimate_top():
+    rel = estimate([100.0], top = 20)
+    assert rel.filter(like = 'rel_prob').sum(axis = 1).iloc[0] == pytest.approx(1)
+    assert len(rel.filter(like = 'relationship').columns) == 11
+
+def test_add_relationships_physical():
+    # physical lengths are converted to centiMorgans when no genetic map was used
+    df = add_relationships(pd.DataFrame({'p1': ['A'], 'p2': ['B'], 'mb': [3400 / 1.18]}))
+    assert df['relationship'].iloc[0] == 'PARENT'
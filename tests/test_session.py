@@ -0,0 +1,32 @@
+import io
+import pytest
+pytest.importorskip('requests')
+from getmydnamatches.session import Session
+from getmydnamatches.getmyancestrydna import Session as AncestrySession
+
+class Response:
+    status_code = 200
+
+class Requests:
+    def request(self, method, url, **kwargs):
+        return Response()
+
+# returns a session with a stub in place of the requests session and without logging in
+def get_session(cls):
+    session = cls.__new__(cls)
+    Session.__init__(session, True, io.StringIO(), 1)
+    session.s = Requests()
+    return session
+
+def test_log_lines():
+    session = get_session(Session)
+    session.request('GET', 'https://example.com/a')
+    assert session.logfile.getvalue().splitlines()[0].endswith('] https://example.com/a Status code 200')
+
+def test_ancestry_log_lines():
+    session = get_session(AncestrySession)
+    session.request('GET', 'https://example.com/a')
+    lines = session.logfile.getvalue().splitlines()
+    assert len(lines) == 2
+    assert lines[0].endswith(']: Downloading: https://example.com/a')
+    assert lines[1].endswith(']: Status code: 200')